@@ -26,6 +26,7 @@ bl_info = {
 }
 
 module_names = [
+    "mesh_geometry",
     "image.__mod__",
     "uv_manipulating.__mod__",
     "selection.__mod__",
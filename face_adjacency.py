@@ -0,0 +1,59 @@
+import bpy
+import numpy
+from . import helper, mesh_cache, mesh_geometry
+
+
+class FaceAdjacency:
+    """
+    The faces of a mesh next to every face, as a CSR index. Two faces are neighbours if they share an edge.
+    The neighbours of face `f` are `faces[offsets[f]:offsets[f + 1]]`.
+    """
+
+    def __init__(self, loop_edges: numpy.ndarray, offsets: numpy.ndarray) -> None:
+        face_sizes = numpy.diff(offsets)
+        face_count = len(face_sizes)
+        loop_faces = numpy.repeat(numpy.arange(face_count), face_sizes)
+
+        # Every loop paired with every loop of the same edge gives the faces sharing it.
+        a, b = helper.get_group_pairs(loop_edges)
+        a, b = loop_faces[a], loop_faces[b]
+
+        # Faces sharing several edges are neighbours once.
+        key_base = max(face_count, 1)
+        pairs = numpy.unique(a[a != b].astype(numpy.int64) * key_base + b[a != b])
+        self.faces = pairs % key_base
+        self.offsets = numpy.zeros(face_count + 1, dtype=numpy.int64)
+        self.offsets[1:] = numpy.cumsum(numpy.bincount(pairs // key_base, minlength=face_count))
+
+    def get_neighbours(self, faces: numpy.ndarray) -> numpy.ndarray:
+        """
+        Get the neighbours of all `faces`, with duplicates.
+        """
+        indices, _ = helper.loop_ranges(self.offsets[:-1][faces], numpy.diff(self.offsets)[faces])
+        return self.faces[indices]
+
+    def grow(self, seeds: numpy.ndarray, allowed: numpy.ndarray) -> numpy.ndarray:
+        """
+        Flood fill from the `seeds` mask over neighbouring faces, ring by ring. Only `allowed` faces are entered, and allowed seeds are the only start points.
+        Returns the mask of all reached faces.
+        """
+        reached = seeds & allowed
+        front = numpy.flatnonzero(reached)
+        while len(front) > 0:
+            neighbours = self.get_neighbours(front)
+            front = numpy.unique(neighbours[allowed[neighbours] & ~reached[neighbours]])
+            reached[front] = True
+        return reached
+
+
+# The face adjacency of every mesh.
+adjacency_cache = mesh_cache.MeshCache()
+
+
+def get_face_adjacency(mesh_data: bpy.types.Mesh) -> FaceAdjacency:
+    """
+    Get the face adjacency of a mesh. Edit mode changes are only seen once the mesh is updated from the edit mesh, as `mesh_access.MeshAccess` does. The adjacency is kept until the faces or the edges of their loops change.
+    """
+    _, loop_indices, offsets = helper.get_mesh_faces(mesh_data, selected_only=False)
+    loop_edges = mesh_geometry.get_loop_edges(mesh_data)[loop_indices]
+    return adjacency_cache.get(mesh_data, (offsets, loop_edges), lambda: FaceAdjacency(loop_edges, offsets))
@@ -1,5 +1,10 @@
+import concurrent.futures
+import os
+
 import bpy
-import bpy
+import mathutils
+import numpy
+from mathutils import kdtree
 from typing import Tuple
 
 
@@ -26,30 +31,256 @@ def closes_pixel(x: float, y: float, width: int, height: int) -> Tuple[float, fl
     return round(x * width) / width, round(y * height) / height
 
 
-def get_uvs_list() -> list[list[(float, float)]]:
+def closest_pixels(uvs: numpy.ndarray, width: int, height: int) -> numpy.ndarray:
+    """
+    Move every UV of an `(n, 2)` array to its closest pixel corner like `closes_pixel`.
+    """
+    size = numpy.array((width, height), dtype=numpy.float64)
+    return numpy.round(uvs * size) / size
+
+
+def get_uv_tree(uvs: list[mathutils.Vector], indices: list[int] = None) -> kdtree.KDTree:
+    """
+    Build a KD-tree of 2D `uvs`, so the closest one to the mouse is found in logarithmic time by `find_closest_uv`. Every UV is stored with its index into `uvs`, or with the matching one of `indices`.
+    """
+    if indices is None:
+        indices = range(len(uvs))
+    tree = kdtree.KDTree(len(uvs))
+    for uv, index in zip(uvs, indices):
+        tree.insert((uv[0], uv[1], 0), index)
+    tree.balance()
+    return tree
+
+
+def find_closest_uv(tree: kdtree.KDTree, point: mathutils.Vector) -> int:
+    """
+    Get the index of the UV in a `get_uv_tree` closest to a 2D `point`, or None if the tree is empty.
+    """
+    _, index, _ = tree.find((point[0], point[1], 0))
+    return index
+
+
+def loop_ranges(loop_start: numpy.ndarray, loop_total: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Expand per face loop ranges into one flat array of loop indices and the offsets of every face inside it.
+    """
+    offsets = numpy.zeros(len(loop_total) + 1, dtype=numpy.int64)
+    numpy.cumsum(loop_total, out=offsets[1:])
+    loop_indices = numpy.repeat(loop_start - offsets[:-1], loop_total) + numpy.arange(offsets[-1])
+    return loop_indices, offsets
+
+
+def connected_components(count: int, a: numpy.ndarray, b: numpy.ndarray) -> numpy.ndarray:
+    """
+    Label the connected components of `count` nodes joined by the pairs `a[i]`, `b[i]` with a vectorized union-find. Returns the component of every node, numbered by first appearance.
+    """
+    parent = numpy.arange(count)
+    a = numpy.asarray(a, dtype=numpy.int64)
+    b = numpy.asarray(b, dtype=numpy.int64)
+    while True:
+        root_a = parent[a]
+        root_b = parent[b]
+        differs = root_a != root_b
+        if not numpy.any(differs):
+            break
+        # Hook the larger root onto the smaller one, then shorten all paths to their root.
+        low = numpy.minimum(root_a[differs], root_b[differs])
+        high = numpy.maximum(root_a[differs], root_b[differs])
+        numpy.minimum.at(parent, high, low)
+        while True:
+            grand_parent = parent[parent]
+            if numpy.array_equal(grand_parent, parent):
+                break
+            parent = grand_parent
+    _, first, labels = numpy.unique(parent, return_index=True, return_inverse=True)
+    return numpy.argsort(numpy.argsort(first))[labels.reshape(-1)]
+
+
+def get_row_keys(rows: numpy.ndarray) -> tuple[numpy.ndarray, int]:
+    """
+    Number the distinct rows of an `(n, m)` integer array. Returns the number of every row and the count of distinct rows. Much faster than `numpy.unique` with an axis.
+    """
+    order = numpy.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    starts = numpy.ones(len(rows), dtype=bool)
+    starts[1:] = numpy.any(sorted_rows[1:] != sorted_rows[:-1], axis=1)
+    keys = numpy.zeros(len(rows), dtype=numpy.int64)
+    keys[order] = numpy.cumsum(starts) - 1
+    return keys, int(starts.sum())
+
+
+def get_group_pairs(groups: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
     """
-    Get all UV groups of all selected feces of all selected objects.
+    Pair every element with every other element of the same group, given by the integer `groups` of all elements. Returns both indices of every ordered pair.
     """
-    bpy.ops.object.mode_set(mode='OBJECT')
+    order = numpy.argsort(groups, kind="stable")
+    starts = numpy.flatnonzero(numpy.diff(groups[order], prepend=-1))
+    sizes = numpy.diff(numpy.append(starts, len(groups)))
+    element_sizes = numpy.repeat(sizes, sizes)
+    partners, _ = loop_ranges(numpy.repeat(starts, sizes), element_sizes)
+    a = numpy.repeat(order, element_sizes)
+    b = order[partners]
+    return a[a != b], b[a != b]
 
-    uvs_list: list[list[(float, float)]] = []
-    for selected_object in bpy.context.selected_objects:
-        mesh_data: bpy.types.Mesh = selected_object.data
-        for polygon in mesh_data.polygons:
-            if len(polygon.loop_indices) == 0:
-                continue
 
-            uvs = []
-            for i in polygon.loop_indices:
-                if polygon.select:
-                    print("Selected UV", i)
-                    mesh_uv_loop = mesh_data.uv_layers.active.data[i]
-                    uvs.append((mesh_uv_loop.uv.x, mesh_uv_loop.uv.y))
-            uvs_list.append(uvs)
+def map_threads(function, *iterables, threads: int = 0) -> list:
+    """
+    Call `function` with the items of `iterables` like `map` on a pool of `threads` threads, by default one per CPU, and return the results in order.
+    NumPy releases the GIL, so array kernels run in parallel. `function` must not access `bpy`, which is only safe on the main thread.
+    """
+    arguments = list(zip(*iterables))
+    threads = min(threads or os.cpu_count() or 1, len(arguments))
+    if threads <= 1:
+        return [function(*argument) for argument in arguments]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(lambda argument: function(*argument), arguments))
+
+
+def get_mesh_objects(objects: list[bpy.types.Object]) -> list[bpy.types.Object]:
+    """
+    Get the first of `objects` for every distinct mesh, so a mesh shared by linked duplicates is only processed once.
+    """
+    mesh_objects = {}
+    for mesh_object in objects:
+        if mesh_object.type == "MESH":
+            mesh_objects.setdefault(mesh_object.data, mesh_object)
+    return list(mesh_objects.values())
+
+
+def get_shared_meshes(objects: list[bpy.types.Object]) -> dict[str, int]:
+    """
+    Get the number of objects using every mesh which is used by more than one of `objects`.
+    """
+    counts = {}
+    for mesh_object in objects:
+        if mesh_object.type == "MESH":
+            counts[mesh_object.data] = counts.get(mesh_object.data, 0) + 1
+    return {mesh_data.name: count for mesh_data, count in counts.items() if count > 1}
+
+
+def report_shared_meshes(operator: bpy.types.Operator, objects: list[bpy.types.Object]):
+    shared = get_shared_meshes(objects)
+    if shared:
+        operator.report({'INFO'}, "Processed shared meshes once: " + ", ".join(f"{name} ({count} objects)" for name, count in shared.items()))
+
+
+def update_mesh(mesh_object: bpy.types.Object):
+    """
+    Write the edit mesh of an object in edit mode to its mesh, so the bulk arrays of the mesh are current without leaving edit mode.
+    """
+    if mesh_object.data.is_editmode:
+        mesh_object.update_from_editmode()
 
-    bpy.ops.object.mode_set(mode='EDIT')
 
-    return uvs_list
+def get_mesh_faces(mesh_data: bpy.types.Mesh, selected_only: bool = True) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Get the selected or all faces of a mesh. Returns their polygon indices, their flat loop indices and the offsets of every face inside them.
+    """
+    polygon_count = len(mesh_data.polygons)
+    select = numpy.ones(polygon_count, dtype=bool)
+    loop_start = numpy.zeros(polygon_count, dtype=numpy.int32)
+    loop_total = numpy.zeros(polygon_count, dtype=numpy.int32)
+    if selected_only:
+        mesh_data.polygons.foreach_get("select", select)
+    mesh_data.polygons.foreach_get("loop_start", loop_start)
+    mesh_data.polygons.foreach_get("loop_total", loop_total)
+
+    loop_indices, offsets = loop_ranges(loop_start[select], loop_total[select])
+    return numpy.flatnonzero(select), loop_indices, offsets
+
+
+def get_layer_uvs(mesh_data: bpy.types.Mesh, uv_layer: bpy.types.MeshUVLoopLayer) -> numpy.ndarray:
+    """
+    Read the UVs of all loops of a UV layer as `(n, 2)` float32 array.
+    """
+    uvs = numpy.zeros(len(mesh_data.loops) * 2, dtype=numpy.float32)
+    uv_layer.data.foreach_get("uv", uvs)
+    return uvs.reshape(-1, 2)
+
+
+def set_layer_uvs(uv_layer: bpy.types.MeshUVLoopLayer, uvs: numpy.ndarray):
+    uv_layer.data.foreach_set("uv", numpy.ascontiguousarray(uvs, dtype=numpy.float32).reshape(-1))
+
+
+def get_vertex_coordinates(mesh_data: bpy.types.Mesh) -> numpy.ndarray:
+    coordinates = numpy.zeros(len(mesh_data.vertices) * 3, dtype=numpy.float32)
+    mesh_data.vertices.foreach_get("co", coordinates)
+    return coordinates.reshape(-1, 3)
+
+
+def get_loop_vertices(mesh_data: bpy.types.Mesh) -> numpy.ndarray:
+    loop_vertices = numpy.zeros(len(mesh_data.loops), dtype=numpy.int32)
+    mesh_data.loops.foreach_get("vertex_index", loop_vertices)
+    return loop_vertices
+
+
+def get_loop_edges(mesh_data: bpy.types.Mesh) -> numpy.ndarray:
+    loop_edges = numpy.zeros(len(mesh_data.loops), dtype=numpy.int32)
+    mesh_data.loops.foreach_get("edge_index", loop_edges)
+    return loop_edges
+
+
+def get_bools(collection: bpy.types.bpy_prop_collection, attribute: str) -> numpy.ndarray:
+    """
+    Read a boolean attribute like `select` of all elements of a mesh collection.
+    """
+    values = numpy.zeros(len(collection), dtype=bool)
+    collection.foreach_get(attribute, values)
+    return values
+
+
+def get_polygon_vectors(mesh_data: bpy.types.Mesh, attribute: str) -> numpy.ndarray:
+    """
+    Read a vector attribute like `normal` or `center` of all polygons as `(n, 3)` float32 array.
+    """
+    vectors = numpy.zeros(len(mesh_data.polygons) * 3, dtype=numpy.float32)
+    mesh_data.polygons.foreach_get(attribute, vectors)
+    return vectors.reshape(-1, 3)
+
+
+def get_mesh_uvs(mesh_data: bpy.types.Mesh, uv_layer: bpy.types.MeshUVLoopLayer = None, selected_only: bool = True) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Read a UV layer, by default the active one, of all selected or all faces of a mesh. Returns the flat `(n, 2)` float32 UVs and the offsets of every face inside them.
+    """
+    if uv_layer is None:
+        uv_layer = mesh_data.uv_layers.active
+    if uv_layer is None:
+        return numpy.zeros((0, 2), dtype=numpy.float32), numpy.zeros(1, dtype=numpy.int64)
+
+    _, loop_indices, offsets = get_mesh_faces(mesh_data, selected_only)
+    return get_layer_uvs(mesh_data, uv_layer)[loop_indices], offsets
+
+
+def select_faces(uvs: numpy.ndarray, offsets: numpy.ndarray, faces: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Get the `(uvs, offsets)` face arrays of a subset of faces given by a boolean mask or indices.
+    """
+    loop_indices, face_offsets = loop_ranges(offsets[:-1][faces], numpy.diff(offsets)[faces])
+    return uvs[loop_indices], face_offsets
+
+
+def concatenate_faces(faces: list[tuple[numpy.ndarray, numpy.ndarray]]) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Join several `(uvs, offsets)` face arrays into one.
+    """
+    uvs = [numpy.zeros((0, 2), dtype=numpy.float32)]
+    offsets = [numpy.zeros(1, dtype=numpy.int64)]
+    for face_uvs, face_offsets in faces:
+        offsets.append(face_offsets[1:] + offsets[-1][-1])
+        uvs.append(face_uvs)
+    return numpy.concatenate(uvs), numpy.concatenate(offsets)
+
+
+def get_uvs() -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Get the UVs of all selected faces of all selected objects as flat `(n, 2)` float32 UVs and per face offsets.
+    """
+    faces = []
+    for selected_object in get_mesh_objects(bpy.context.selected_objects):
+        update_mesh(selected_object)
+        faces.append(get_mesh_uvs(selected_object.data))
+
+    return concatenate_faces(faces)
 
 
 def register():
@@ -0,0 +1,178 @@
+"""
+Export pixel UV layouts of many .blend files without the UI.
+
+Inside Blender every file is exported by its own background Blender process:
+
+    blender -b --python-expr "import pixel_perfect.image.batch_export as b; b.main()" -- assets/*.blend -o layouts -s 256 256
+
+With the `bpy` module the files are exported by a process pool:
+
+    python -c "import pixel_perfect.image.batch_export as b; b.main()" assets/*.blend -o layouts -s 256 256
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import bpy
+from .. import helper
+from . import export_pixel_uv_layout, layout_cache, png_writer
+
+
+def get_arguments(argv: list[str] = None) -> list[str]:
+    if argv is not None:
+        return argv
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+    if bpy.app.binary_path:
+        return []
+    return sys.argv[1:]
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="batch_export", description="Export a pixel UV layout for every mesh object of every .blend file.")
+    parser.add_argument("files", nargs="*", help="The .blend files to export")
+    parser.add_argument("-o", "--output", default=".", help="The directory the layouts are written to")
+    parser.add_argument("-s", "--size", nargs=2, type=int, default=(256, 256), metavar=("WIDTH", "HEIGHT"), help="The size of the layout images")
+    parser.add_argument("--objects", default="*", help="Only export objects which names match this pattern")
+    parser.add_argument("--uv-layer", default=None, help="Use the first UV layer which name matches this pattern instead of the active one")
+    parser.add_argument("--opaque", action="store_true", help="Draw a checkerboard background instead of a transparent one")
+    parser.add_argument("--indexed", action="store_true", help="Write indexed PNGs if possible")
+    parser.add_argument("--compression", type=int, default=png_writer.COMPRESSION, metavar="PERCENT", help="The PNG compression in percent")
+    parser.add_argument("--tiled", action="store_true", help="Render and write the images in row strips")
+    parser.add_argument("--cache", default=None, metavar="DIRECTORY", help="Reuse layouts with unchanged UVs from this cache directory")
+    parser.add_argument("--cache-size", type=int, default=1024, metavar="MEGABYTES", help="The size the cache is trimmed to")
+    parser.add_argument("-t", "--threads", type=int, default=1, help="The number of threads drawing one layout")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="The number of files exported at the same time")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    return parser
+
+
+def get_uv_layer(mesh_data: bpy.types.Mesh, pattern: str) -> bpy.types.MeshUVLoopLayer:
+    if pattern is None:
+        return mesh_data.uv_layers.active
+    for uv_layer in mesh_data.uv_layers:
+        if fnmatch.fnmatchcase(uv_layer.name, pattern):
+            return uv_layer
+    return None
+
+
+def export_objects(arguments: argparse.Namespace) -> list[str]:
+    """
+    Export a layout of all faces of every matching mesh object in the open file. Returns the written files.
+    """
+    width, height = arguments.size
+    name = os.path.splitext(os.path.basename(bpy.data.filepath))[0]
+    cache = None
+    if arguments.cache is not None:
+        cache = layout_cache.LayoutCache(arguments.cache, arguments.cache_size * 1024 * 1024, link=True)
+
+    filepaths = []
+    for selected_object in bpy.data.objects:
+        if not selected_object.type == "MESH" or not fnmatch.fnmatchcase(selected_object.name, arguments.objects):
+            continue
+        mesh_data: bpy.types.Mesh = selected_object.data
+        uv_layer = get_uv_layer(mesh_data, arguments.uv_layer)
+        if uv_layer is None:
+            continue
+
+        uvs, offsets = helper.get_mesh_uvs(mesh_data, uv_layer, selected_only=False)
+        filepath = os.path.join(arguments.output, f"{bpy.path.clean_name(name)}_{bpy.path.clean_name(selected_object.name)}.png")
+        export_pixel_uv_layout.write_layout(filepath, uvs, offsets, width, height, not arguments.opaque, arguments.indexed, arguments.tiled, cache=cache, threads=arguments.threads, compression=arguments.compression)
+        filepaths.append(filepath)
+    return filepaths
+
+
+def export_file(filepath: str, arguments: argparse.Namespace) -> tuple[str, int, float, str]:
+    """
+    Open a .blend file with the `bpy` module and export it. Runs inside a pool process.
+    """
+    start = time.perf_counter()
+    try:
+        bpy.ops.wm.open_mainfile(filepath=filepath)
+        count = len(export_objects(arguments))
+        error = ""
+    except Exception as exception:
+        count = 0
+        error = str(exception)
+    return filepath, count, time.perf_counter() - start, error
+
+
+def export_file_process(filepath: str, arguments: argparse.Namespace) -> tuple[str, int, float, str]:
+    """
+    Export a .blend file in a background Blender process.
+    """
+    start = time.perf_counter()
+    command = [
+        bpy.app.binary_path, "-b", filepath,
+        # Without an exit code Blender exits with 0 even if the script raised.
+        "--python-exit-code", "1",
+        "--python-expr", f"import {__name__} as batch_export; batch_export.main()",
+        "--", "--worker",
+        "-o", arguments.output,
+        "-s", str(arguments.size[0]), str(arguments.size[1]),
+        "--objects", arguments.objects,
+        "--threads", str(arguments.threads),
+        "--compression", str(arguments.compression),
+    ]
+    if arguments.uv_layer is not None:
+        command += ["--uv-layer", arguments.uv_layer]
+    if arguments.opaque:
+        command.append("--opaque")
+    if arguments.indexed:
+        command.append("--indexed")
+    if arguments.tiled:
+        command.append("--tiled")
+    if arguments.cache is not None:
+        command += ["--cache", arguments.cache, "--cache-size", str(arguments.cache_size)]
+
+    environment = os.environ.copy()
+    package_directory = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [package_directory, environment.get("PYTHONPATH")]))
+
+    result = subprocess.run(command, capture_output=True, text=True, env=environment)
+    count = sum(1 for line in result.stdout.splitlines() if line.startswith("Exported "))
+    error = ""
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        error = lines[-1] if lines else f"Exit code {result.returncode}"
+    return filepath, count, time.perf_counter() - start, error
+
+
+def print_summary(results: list[tuple[str, int, float, str]], total: float):
+    print(f"{'File':<48} {'Layouts':>8} {'Seconds':>9}")
+    for filepath, count, seconds, error in results:
+        print(f"{os.path.basename(filepath):<48} {count:>8} {seconds:>9.2f}" + (f"  {error}" if error else ""))
+    print(f"{'Total':<48} {sum(result[1] for result in results):>8} {total:>9.2f}")
+
+
+def main(argv: list[str] = None):
+    arguments = get_parser().parse_args(get_arguments(argv))
+    arguments.output = os.path.abspath(arguments.output)
+    if arguments.cache is not None:
+        arguments.cache = os.path.abspath(arguments.cache)
+    os.makedirs(arguments.output, exist_ok=True)
+
+    if arguments.worker:
+        for filepath in export_objects(arguments):
+            print("Exported", filepath)
+        return
+
+    start = time.perf_counter()
+    files = [os.path.abspath(filepath) for filepath in arguments.files]
+    if bpy.app.binary_path:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=arguments.jobs)
+        function = export_file_process
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=arguments.jobs, mp_context=multiprocessing.get_context("spawn"))
+        function = export_file
+
+    with executor:
+        results = list(executor.map(function, files, [arguments] * len(files)))
+
+    print_summary(results, time.perf_counter() - start)
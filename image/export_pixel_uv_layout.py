@@ -1,9 +1,12 @@
-import math
+import concurrent.futures
 import os
+import threading
 
 import bpy
+import numpy
 import bpy_extras.io_utils
 from .. import helper
+from . import layout_cache, png_writer, rasterizer
 
 
 class OT_ExportPixelUVLayoutFilebrowser(bpy.types.Operator, bpy_extras.io_utils.ExportHelper):
@@ -28,6 +31,22 @@ class OT_ExportPixelUVLayoutFilebrowser(bpy.types.Operator, bpy_extras.io_utils.
         default=1
     )
 
+    compression: bpy.props.IntProperty(name="Compression", description="The PNG compression in percent. Higher values make smaller files but take a lot longer to write", default=png_writer.COMPRESSION, min=0, max=100, subtype="PERCENTAGE")
+    indexed: bpy.props.BoolProperty(name="Indexed Colors", description="Write a PNG with a color palette if the layout has at most 256 colors. Makes the file a lot smaller", default=False)
+    split_udim: bpy.props.BoolProperty(name="Split UDIM Tiles", description="Write one image per UDIM tile. Every face belongs to the tile of its UV center", default=False)
+    split_materials: bpy.props.BoolProperty(name="Split Materials", description="Write one image per material", default=False)
+    all_uv_layers: bpy.props.BoolProperty(name="All UV Maps", description="Write one image per UV map instead of only using the active one", default=False)
+    incremental: bpy.props.BoolProperty(name="Incremental", description="Keep this export in memory and only redraw the faces around changed UVs when exporting to the same file again", default=False)
+    use_cache: bpy.props.BoolProperty(name="Use Cache", description="Reuse the image of an earlier export with the same UVs and settings instead of rendering it again", default=False)
+    threads: bpy.props.IntProperty(name="Threads", description="The number of threads used to draw the layout. 0 uses one thread per core", default=1, min=0)
+    tiled: bpy.props.BoolProperty(name="Tiled", description="Render the image in row strips and write them directly to a PNG file. Keeps the memory use low for very large images", default=False)
+    strip_height: bpy.props.IntProperty(
+        name="Strip Height",
+        description="The number of rows rendered at once in tiled mode",
+        default=256,
+        min=1
+    )
+
     def draw(self, context):
         self.layout.use_property_split = True
 
@@ -38,30 +57,64 @@ class OT_ExportPixelUVLayoutFilebrowser(bpy.types.Operator, bpy_extras.io_utils.
         column.prop(data=self, property="width", text="Size")
         column.prop(data=self, property="height", text=" ")
 
+        self.layout.prop(data=self, property="split_udim")
+        self.layout.prop(data=self, property="split_materials")
+        self.layout.prop(data=self, property="all_uv_layers")
+        self.layout.prop(data=self, property="compression")
+        self.layout.prop(data=self, property="indexed")
+        self.layout.prop(data=self, property="incremental")
+        self.layout.prop(data=self, property="use_cache")
+        self.layout.prop(data=self, property="threads")
+        self.layout.prop(data=self, property="tiled")
+        row = self.layout.row()
+        row.enabled = self.tiled
+        row.prop(data=self, property="strip_height")
+
     def execute(self, context):
         filename, extension = os.path.splitext(self.filepath)
 
+        if self.split_udim or self.split_materials or self.all_uv_layers:
+            layouts = get_layouts(self.split_udim, self.split_materials, self.all_uv_layers)
+        else:
+            layouts = {(): helper.get_uvs()}
+
+        filepaths = [filename + "".join(f".{part}" for part in parts) + extension for parts in layouts]
+        if extension.lower() == ".png" and len(layouts) > 1:
+            # Every layout is drawn by its own thread, so all options are read on the main thread first.
+            cache = layout_cache.LayoutCache() if self.use_cache else None
+            options = (self.width, self.height, self.transparency, self.indexed, self.tiled, self.strip_height, cache, self.incremental)
+            compression = self.compression
+            helper.map_threads(lambda filepath, faces: write_layout(filepath, *faces, *options, compression=compression), filepaths, layouts.values(), threads=self.threads)
+        else:
+            for filepath, (uvs, offsets) in zip(filepaths, layouts.values()):
+                self.write(filepath, uvs, offsets)
+
+        helper.report_shared_meshes(self, context.selected_objects)
+        return {'FINISHED'}
+
+    def write(self, filepath: str, uvs: numpy.ndarray, offsets: numpy.ndarray):
+        filename, extension = os.path.splitext(filepath)
+
         width = self.width
         height = self.height
 
-        uvs_list = get_uvs_list()
+        if extension.lower() == ".png":
+            cache = layout_cache.LayoutCache() if self.use_cache else None
+            write_layout(filepath, uvs, offsets, width, height, self.transparency, self.indexed, self.tiled, self.strip_height, cache, self.incremental, self.threads or os.cpu_count(), self.compression)
+            return
 
         print("get pixels")
-        pixels = get_image(uvs_list, width, height, self.transparency)
+        pixels = get_image(uvs, offsets, width, height, self.transparency, self.threads or os.cpu_count())
 
         print("create image")
-        image = bpy.data.images.new(filename, width, height, alpha=self.transparency)
+        image = bpy.data.images.new(bpy.path.basename(filename), width, height, alpha=self.transparency)
         image.file_format = extension[1:].upper()
-        image.filepath = self.filepath
-        image.pixels = pixels[:]
-        image.asset_generate_preview()
-        image.update()
+        image.filepath = filepath
+        image.pixels.foreach_set(pixels)
         image.save()
 
         bpy.data.batch_remove([image.id_data])
 
-        return {'FINISHED'}
-
 
 class OT_ExportPixelUVLayout(bpy.types.Operator):
     bl_label = "Export Pixel UV Layout"
@@ -78,170 +131,371 @@ def execute():
     bpy.ops.uv.export_pixel_uv_layout_filebrowser('INVOKE_DEFAULT', width=width, height=height)
 
 
-def get_uvs_list():
-    bpy.ops.object.mode_set(mode='OBJECT')
+def get_udim_name(tile_u: int, tile_v: int) -> str:
+    if 0 <= tile_u < 10 and tile_v >= 0:
+        return str(1001 + tile_u + 10 * tile_v)
+    return f"u{tile_u}_v{tile_v}"
+
 
-    uvs_list: list[list[(float, float)]] = []
-    for selected_object in bpy.context.selected_objects:
+def get_layouts(split_udim: bool, split_materials: bool, all_uv_layers: bool) -> dict[tuple[str, ...], tuple[numpy.ndarray, numpy.ndarray]]:
+    """
+    Read all selected faces of all selected objects once and partition them by UV layer, material and UDIM tile. Faces of a UDIM tile are moved into the 0 to 1 range.
+    Returns the `(uvs, offsets)` face arrays of every partition keyed by the names of the UV layer, the material and the tile as far as they are split.
+    """
+    partitions: dict[tuple[str, ...], list[tuple[numpy.ndarray, numpy.ndarray]]] = {}
+    for selected_object in helper.get_mesh_objects(bpy.context.selected_objects):
+        helper.update_mesh(selected_object)
         mesh_data: bpy.types.Mesh = selected_object.data
-        for polygon in mesh_data.polygons:
-            if len(polygon.loop_indices) == 0:
+        polygons, loop_indices, offsets = helper.get_mesh_faces(mesh_data)
+
+        materials = numpy.zeros(len(polygons), dtype=numpy.int32)
+        material_names = ["None"]
+        if split_materials:
+            material_indices = numpy.zeros(len(mesh_data.polygons), dtype=numpy.int32)
+            mesh_data.polygons.foreach_get("material_index", material_indices)
+            materials = material_indices[polygons]
+            material_names = [bpy.path.clean_name(slot.material.name) if slot.material else "None" for slot in selected_object.material_slots] or material_names
+
+        uv_layers = mesh_data.uv_layers if all_uv_layers else [mesh_data.uv_layers.active]
+        for uv_layer in uv_layers:
+            if uv_layer is None:
                 continue
+            uvs = helper.get_layer_uvs(mesh_data, uv_layer)[loop_indices]
+
+            tiles = numpy.zeros((len(polygons), 2), dtype=numpy.int64)
+            if split_udim:
+                tiles = numpy.floor(rasterizer.face_centers(uvs, offsets)).astype(numpy.int64)
+
+            groups = numpy.column_stack((materials, tiles))
+            keys, group_indices = numpy.unique(groups, axis=0, return_inverse=True)
+            for group, (material, tile_u, tile_v) in enumerate(keys):
+                group_uvs, group_offsets = helper.select_faces(uvs, offsets, group_indices.reshape(-1) == group)
+                group_uvs = group_uvs - numpy.array((tile_u, tile_v), dtype=numpy.float32)
+
+                parts = []
+                if all_uv_layers:
+                    parts.append(bpy.path.clean_name(uv_layer.name))
+                if split_materials:
+                    parts.append(material_names[min(material, len(material_names) - 1)])
+                if split_udim:
+                    parts.append(get_udim_name(tile_u, tile_v))
+                partitions.setdefault(tuple(parts), []).append((group_uvs, group_offsets))
+
+    return {parts: helper.concatenate_faces(faces) for parts, faces in partitions.items()}
+
+
+def write_layout(filepath: str, uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool, indexed: bool = False, tiled: bool = False, strip_height: int = 256, cache: layout_cache.LayoutCache = None, incremental: bool = False, threads: int = 1, compression: int = png_writer.COMPRESSION):
+    """
+    Render the layout of the faces and write it as PNG file with a `compression` in percent. With a `cache` an identical earlier export is reused.
+    An `incremental` export redraws only the changed parts of the last incremental export to the same file. It is ignored for `tiled` exports, which never hold the whole image.
+    """
+    key = None
+    if cache is not None:
+        key = cache.get_key(uvs, offsets, width, height, transparent, indexed, compression)
+        if cache.fetch(key, filepath):
+            print("cached layout", key)
+            return
+
+    # Never write through a file that is linked to a cache entry.
+    if os.path.exists(filepath):
+        os.remove(filepath)
+
+    palette = None
+    if indexed:
+        palette = get_palette(uvs, offsets, transparent)
+
+    if tiled:
+        print("write strips")
+        write_image_strips(filepath, uvs, offsets, width, height, transparent, strip_height, palette, threads, compression)
+    elif incremental:
+        print("update pixels")
+        snapshot = get_layout_snapshot(filepath, uvs, offsets, width, height, transparent)
+        print("write image")
+        snapshot.write(filepath, palette, compression)
+    else:
+        print("get pixels")
+        pixels = get_image(uvs, offsets, width, height, transparent, threads)
+        print("write image")
+        png_writer.write_png(filepath, pixels, width, height, transparent, palette, compression)
 
-            uvs = []
-            for i in polygon.loop_indices:
-                if polygon.select:
-                    print("Selected UV", i)
-                    mesh_uv_loop = mesh_data.uv_layers.active.data[i]
-                    uvs.append((mesh_uv_loop.uv.x, mesh_uv_loop.uv.y))
-            uvs_list.append(uvs)
-
-    bpy.ops.object.mode_set(mode='EDIT')
-
-    return uvs_list
-
-
-def calculate_draw_pixel(uvs: list[(float, float)], width, height):
-    pixel_index: list[int] = []
-
-    middle_x = 0.0
-    middle_y = 0.0
-
-    for i in range(len(uvs)):
-        middle_x += uvs[i][0]
-        middle_y += uvs[i][1]
-
-    middle_x = middle_x / (len(uvs)) * width
-    middle_y = middle_y / (len(uvs)) * height
-
-    uvs.append(uvs[0])
-
-    for i in range(len(uvs) - 1):
-        x1 = uvs[i][0] * width
-        y1 = uvs[i][1] * height
-        x2 = uvs[i + 1][0] * width
-        y2 = uvs[i + 1][1] * height
-
-        if abs(x2 - x1) > abs(y2 - y1):
-            if x1 > x2:
-                temp_x = x1
-                x1 = x2
-                x2 = temp_x
-                temp_y = y1
-                y1 = y2
-                y2 = temp_y
-
-            top = False
-            if (y1 + y2) / 2 > middle_y:
-                top = True
-                y1 -= 1.01
-                y2 -= 1.01
-            else:
-                y1 += 0.01
-                y2 += 0.01
-
-            if x1 != x2:
-                y1 = y1 + (y2 - y1) * (math.floor(x1 + 0.01) - x1) / (x2 - x1)
-                y2 = y1 + (y2 - y1) * (math.ceil(x2 - 0.01) - x1) / (x2 - x1)
-            x1 = math.floor(x1 + 0.01)
-            x2 = math.ceil(x2 - 0.01)
-
-            for x in range(x1, x2):
-                if y1 < y2:
-                    if top:
-                        y = math.ceil(y1 + (y2 - y1) / (x2 - x1) * (x + 1 - x1))
-                    else:
-                        y = math.floor(y1 + (y2 - y1) / (x2 - x1) * (x + 0 - x1))
-                else:
-                    if top:
-                        y = math.ceil(y1 + (y2 - y1) / (x2 - x1) * (x + 0 - x1))
-                    else:
-                        y = math.floor(y1 + (y2 - y1) / (x2 - x1) * (x + 1 - x1))
-
-                pixel_index.append((y * width + x) * 4)
-        else:
-            if y1 > y2:
-                temp_x = x1
-                x1 = x2
-                x2 = temp_x
-                temp_y = y1
-                y1 = y2
-                y2 = temp_y
-
-            top = False
-            if (x1 + x2) / 2 > middle_x:
-                top = True
-                x1 -= 1.01
-                x2 -= 1.01
-            else:
-                x1 += 0.01
-                x2 += 0.01
-
-            if y1 != y2:
-                x1 = x1 + (x2 - x1) * (math.floor(y1 + 0.01) - y1) / (y2 - y1)
-                x2 = x1 + (x2 - x1) * (math.ceil(y2 - 0.01) - y1) / (y2 - y1)
-            y1 = math.floor(y1 + 0.01)
-            y2 = math.ceil(y2 - 0.01)
-
-            for y in range(y1, y2):
-                if x1 < x2:
-                    if top:
-                        x = math.ceil(x1 + (x2 - x1) / (y2 - y1) * (y + 1 - y1))
-                    else:
-                        x = math.floor(x1 + (x2 - x1) / (y2 - y1) * (y + 0 - y1))
-                else:
-                    if top:
-                        x = math.ceil(x1 + (x2 - x1) / (y2 - y1) * (y + 0 - y1))
-                    else:
-                        x = math.floor(x1 + (x2 - x1) / (y2 - y1) * (y + 1 - y1))
-
-                pixel_index.append((y * width + x) * 4)
-
-    uvs.clear()
-    return pixel_index
-
-
-def get_image(uvs_list: list[list[(float, float)]], width: int, height: int, transparent: bool):
-    pixels = [0.0] * width * height * 4
+    if cache is not None:
+        cache.store(key, filepath)
 
-    if not transparent:
-        for y in range(height):
-            for x in range(width):
-                i = (y * width + x) * 4
-                if (x + y) % 2 == 0:
-                    pixels[i] = 0.0
-                    pixels[i + 1] = 0.0
-                    pixels[i + 2] = 0.0
-                else:
-                    pixels[i] = 0.1
-                    pixels[i + 1] = 0.1
-                    pixels[i + 2] = 0.1
-
-                pixels[i + 3] = 1
-
-    print("UVs:", len(uvs_list), "Size: ", width, height)
-    for uvs in uvs_list:
-        if len(uvs) == 0:
-            continue
-
-        average_x = 0.0
-        average_y = 0.0
-        for uv in uvs:
-            average_x += uv[0]
-            average_y += uv[1]
-
-        average_x = max(0.0, min(average_x / len(uvs), 1.0))
-        average_y = max(0.0, min(average_y / len(uvs), 1.0))
-
-        for i in calculate_draw_pixel(uvs, width, height):
-            if i >= len(pixels) or i < 0:
-                continue
-            pixels[i] = average_x
-            pixels[i + 1] = average_y
-            pixels[i + 2] = 0
-            pixels[i + 3] = 1
 
-    return pixels
+def get_background(start: int, end: int, width: int, transparent: bool) -> numpy.ndarray:
+    """
+    Get the background of the rows from `start` to `end` as `(n, 4)` float32 pixels.
+    """
+    pixels = numpy.zeros((end - start, width, 4), dtype=numpy.float32)
+
+    if not transparent:
+        checker = numpy.add.outer(numpy.arange(start, end), numpy.arange(width)) % 2
+        pixels[:, :, :3] = (checker * 0.1)[:, :, numpy.newaxis]
+        pixels[:, :, 3] = 1.0
+
+    return pixels.reshape(-1, 4)
+
+
+def get_image(uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool, threads: int = 1) -> numpy.ndarray:
+    """
+    Render the layout into a flat float32 RGBA buffer as expected by `bpy.types.Image.pixels`.
+    """
+    pixels = get_background(0, height, width, transparent)
+
+    print("UVs:", len(offsets) - 1, "Size: ", width, height)
+    pixel_indices, pixel_faces = rasterizer.rasterize_faces(uvs, offsets, width, height, threads)
+    scatter_pixels(pixels, pixel_indices, rasterizer.face_colors(uvs, offsets)[pixel_faces], threads)
+
+    return pixels.reshape(-1)
+
+
+def get_image_strips(uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool, strip_height: int, threads: int = 1):
+    """
+    Render the layout strip by strip, starting with the top most strip. Yields the first row of every strip and its `(n, 4)` float32 pixels.
+    Only one strip is held in memory at a time. The drawn border pixels are binned by strip beforehand.
+    """
+    print("UVs:", len(offsets) - 1, "Size: ", width, height, "Strip: ", strip_height)
+    pixel_indices, pixel_faces = rasterizer.rasterize_faces(uvs, offsets, width, height, threads)
+    colors = rasterizer.face_colors(uvs, offsets)
+
+    valid = (pixel_indices >= 0) & (pixel_indices < width * height)
+    pixel_indices = pixel_indices[valid]
+    pixel_faces = pixel_faces[valid]
+
+    strip_count = (height + strip_height - 1) // strip_height
+    strips = pixel_indices // (width * strip_height)
+    order = numpy.argsort(strips, kind="stable")
+    bounds = numpy.searchsorted(strips[order], numpy.arange(strip_count + 1))
+
+    for strip in reversed(range(strip_count)):
+        start = strip * strip_height
+        pixels = get_background(start, min(start + strip_height, height), width, transparent)
+        in_strip = order[bounds[strip]:bounds[strip + 1]]
+        scatter_pixels(pixels, pixel_indices[in_strip] - start * width, colors[pixel_faces[in_strip]])
+        yield start, pixels
+
+
+def write_image_strips(filepath: str, uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool, strip_height: int, palette: numpy.ndarray = None, threads: int = 1, compression: int = png_writer.COMPRESSION):
+    """
+    Render the layout in strips and stream it to a PNG file. The file is identical to writing the whole `get_image` buffer with `png_writer.write_png`.
+    """
+    with open(filepath, "wb") as file:
+        writer = png_writer.PNGWriter(file, width, height, transparent, palette, compression)
+        for _, pixels in get_image_strips(uvs, offsets, width, height, transparent, strip_height, threads):
+            rows = pixels.reshape(-1, width, 4)[::-1, :, :writer.channels]
+            writer.write_rows(png_writer.float_to_byte(rows))
+        writer.close()
+
+
+class LayoutSnapshot:
+    """
+    The faces and the rendered uint8 `(n, 4)` pixels of an earlier export. Changed faces are found by comparing UVs, so the faces have to keep their order.
+    The compressed PNG row blocks of the last write are kept as well, so only the blocks with redrawn pixels are compressed again.
+    """
+
+    TILE_SIZE = 32
+    # Drawn border pixels can lie up to three pixels outside the UV bounds of their face.
+    PADDING = 3
+
+    def __init__(self, uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool) -> None:
+        self.uvs = uvs.copy()
+        self.offsets = offsets.copy()
+        self.width = width
+        self.height = height
+        self.transparent = transparent
+        self.pixels = png_writer.float_to_byte(get_image(uvs, offsets, width, height, transparent).reshape(-1, 4))
+        self.encoding = None
+        self.blocks = []
+
+    def get_size(self) -> int:
+        """
+        Get the number of bytes the snapshot holds.
+        """
+        return self.pixels.nbytes + self.uvs.nbytes + self.offsets.nbytes + sum(len(block[0]) for block in self.blocks if block is not None)
+
+    def matches(self, offsets: numpy.ndarray, width: int, height: int, transparent: bool) -> bool:
+        return (self.width, self.height, self.transparent) == (width, height, transparent) and numpy.array_equal(self.offsets, offsets)
+
+    def get_changed_faces(self, uvs: numpy.ndarray) -> numpy.ndarray:
+        sizes = numpy.diff(self.offsets)
+        changed = numpy.zeros(len(sizes), dtype=bool)
+        if len(uvs) > 0:
+            changed_loops = numpy.any(self.uvs != uvs, axis=1)
+            changed[sizes > 0] = numpy.logical_or.reduceat(changed_loops, self.offsets[:-1][sizes > 0])
+        return changed
+
+    def get_face_bounds(self, uvs: numpy.ndarray) -> numpy.ndarray:
+        """
+        Get the padded pixel bounds `(min_x, min_y, max_x, max_y)` of every face. Empty faces get empty bounds.
+        """
+        sizes = numpy.diff(self.offsets)
+        bounds = numpy.zeros((len(sizes), 4), dtype=numpy.int64)
+        bounds[:, :2] = 1
+        bounds[:, 2:] = -1
+        if len(uvs) > 0:
+            points = uvs.astype(numpy.float64) * (self.width, self.height)
+            starts = self.offsets[:-1][sizes > 0]
+            bounds[sizes > 0, :2] = numpy.floor(numpy.minimum.reduceat(points, starts)) - self.PADDING
+            bounds[sizes > 0, 2:] = numpy.ceil(numpy.maximum.reduceat(points, starts)) + self.PADDING
+        return bounds
+
+    def get_dirty_pixels(self, dirty_tiles: numpy.ndarray) -> numpy.ndarray:
+        tile_y, tile_x = numpy.nonzero(dirty_tiles)
+        steps = numpy.arange(self.TILE_SIZE)
+        y = (tile_y[:, numpy.newaxis, numpy.newaxis] * self.TILE_SIZE + steps[numpy.newaxis, :, numpy.newaxis])
+        x = (tile_x[:, numpy.newaxis, numpy.newaxis] * self.TILE_SIZE + steps[numpy.newaxis, numpy.newaxis, :])
+        y, x = numpy.broadcast_arrays(y, x)
+        inside = (x < self.width) & (y < self.height)
+        return (y * self.width + x)[inside]
+
+    def update(self, uvs: numpy.ndarray):
+        """
+        Redraw every tile touched by a face which UVs changed, before or after the change.
+        """
+        changed = self.get_changed_faces(uvs)
+        if not numpy.any(changed):
+            return
+
+        width, height = self.width, self.height
+        tile_size = self.TILE_SIZE
+        dirty_tiles = numpy.zeros(((height + tile_size - 1) // tile_size, (width + tile_size - 1) // tile_size), dtype=bool)
+        for face_uvs in (self.uvs, uvs):
+            pixel_indices, _ = rasterizer.rasterize_faces(*helper.select_faces(face_uvs, self.offsets, changed), width, height)
+            pixel_indices = pixel_indices[(pixel_indices >= 0) & (pixel_indices < width * height)]
+            dirty_tiles[pixel_indices // width // tile_size, pixel_indices % width // tile_size] = True
+
+        # Faces reaching past the left or right border wrap into the neighbouring rows, so they are always redrawn.
+        bounds = self.get_face_bounds(uvs)
+        wraps = (bounds[:, 0] < 0) | (bounds[:, 2] >= width)
+        tile_bounds = numpy.clip(bounds // tile_size, 0, [dirty_tiles.shape[1] - 1, dirty_tiles.shape[0] - 1] * 2)
+        summed = numpy.zeros((dirty_tiles.shape[0] + 1, dirty_tiles.shape[1] + 1), dtype=numpy.int64)
+        summed[1:, 1:] = numpy.cumsum(numpy.cumsum(dirty_tiles, axis=0), axis=1)
+        x0, y0, x1, y1 = tile_bounds.T
+        touched = summed[y1 + 1, x1 + 1] - summed[y0, x1 + 1] - summed[y1 + 1, x0] + summed[y0, x0] > 0
+        inside = (bounds[:, 2] >= 0) & (bounds[:, 3] >= 0) & (bounds[:, 0] < width) & (bounds[:, 1] < height)
+        redraw = (touched & inside) | (wraps & (bounds[:, 0] <= bounds[:, 2]))
+
+        dirty_pixels = self.get_dirty_pixels(dirty_tiles)
+        # PNG rows start at the top, the pixels at the bottom.
+        for block in numpy.unique((height - 1 - dirty_pixels // width) // png_writer.BLOCK_ROWS).tolist():
+            if block < len(self.blocks):
+                self.blocks[block] = None
+        background = png_writer.float_to_byte(get_background(0, 2, 1, self.transparent))
+        self.pixels[dirty_pixels] = background[(dirty_pixels // width + dirty_pixels % width) % 2]
+
+        redraw_uvs, redraw_offsets = helper.select_faces(uvs, self.offsets, redraw)
+        pixel_indices, pixel_faces = rasterizer.rasterize_faces(redraw_uvs, redraw_offsets, width, height)
+        valid = (pixel_indices >= 0) & (pixel_indices < width * height)
+        pixel_indices = pixel_indices[valid]
+        pixel_faces = pixel_faces[valid]
+        in_dirty = dirty_tiles[pixel_indices // width // tile_size, pixel_indices % width // tile_size]
+        colors = png_writer.float_to_byte(rasterizer.face_colors(redraw_uvs, redraw_offsets))
+        scatter_pixels(self.pixels, pixel_indices[in_dirty], colors[pixel_faces[in_dirty]])
+
+        self.uvs = uvs.copy()
+
+    def write(self, filepath: str, palette: numpy.ndarray = None, compression: int = png_writer.COMPRESSION):
+        """
+        Write the pixels as PNG file. Row blocks which did not change since the last write with the same palette and compression are not compressed again.
+        """
+        encoding = (compression, None if palette is None else palette.tobytes())
+        block_count = (self.height + png_writer.BLOCK_ROWS - 1) // png_writer.BLOCK_ROWS
+        if encoding != self.encoding:
+            self.encoding = encoding
+            self.blocks = [None] * block_count
+
+        with open(filepath, "wb") as file:
+            writer = png_writer.PNGWriter(file, self.width, self.height, self.transparent, palette, compression)
+            rows = self.pixels.reshape(self.height, self.width, 4)[::-1, :, :writer.channels]
+            for block in range(block_count):
+                if self.blocks[block] is None:
+                    self.blocks[block] = writer.compress_rows(rows[block * png_writer.BLOCK_ROWS:(block + 1) * png_writer.BLOCK_ROWS])
+                writer.write_block(self.blocks[block])
+            writer.close()
+
+
+# Incremental exports keep their snapshots until they hold more than this many bytes, then the least recently used ones are dropped.
+SNAPSHOT_MEMORY = 1 << 30
+
+# The snapshots of incremental exports by absolute file path, the least recently used first.
+layout_snapshots: dict[str, LayoutSnapshot] = {}
+snapshot_lock = threading.Lock()
+
+
+def get_layout_snapshot(key: str, uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool) -> LayoutSnapshot:
+    """
+    Get the rendered snapshot of the layout, updated from the snapshot of the last call with the same `key` if there is one.
+    """
+    key = os.path.abspath(key)
+    with snapshot_lock:
+        snapshot = layout_snapshots.pop(key, None)
+    if snapshot is None or not snapshot.matches(offsets, width, height, transparent):
+        snapshot = LayoutSnapshot(uvs, offsets, width, height, transparent)
+    else:
+        snapshot.update(uvs)
+
+    with snapshot_lock:
+        layout_snapshots[key] = snapshot
+        size = sum(other.get_size() for other in layout_snapshots.values())
+        while size > SNAPSHOT_MEMORY and len(layout_snapshots) > 1:
+            size -= layout_snapshots.pop(next(iter(layout_snapshots))).get_size()
+    return snapshot
+
+
+@bpy.app.handlers.persistent
+def clear_snapshots(*arguments):
+    """
+    Drop all snapshots, which belong to the meshes of the file open before.
+    """
+    with snapshot_lock:
+        layout_snapshots.clear()
+
+
+def get_palette(uvs: numpy.ndarray, offsets: numpy.ndarray, transparent: bool) -> numpy.ndarray | None:
+    """
+    Get every 8 bit color the layout can contain as PNG palette, or None if there are more than 256.
+    """
+    colors = [rasterizer.face_colors(uvs, offsets)]
+    if transparent:
+        colors.append(numpy.zeros((1, 4), dtype=numpy.float32))
+    else:
+        colors.append(numpy.array(((0.0, 0.0, 0.0, 1.0), (0.1, 0.1, 0.1, 1.0)), dtype=numpy.float32))
+    colors = png_writer.float_to_byte(numpy.concatenate(colors))
+    return png_writer.get_palette(colors[:, :4 if transparent else 3])
+
+
+def scatter_pixels(pixels: numpy.ndarray, indices: numpy.ndarray, colors: numpy.ndarray, threads: int = 1):
+    """
+    Write `colors` to the rows `indices` of a `(n, 4)` pixel buffer in one scatter. Indices outside the buffer are dropped and if an index occurs more than once the last color wins.
+    With more than one thread every thread writes its own band of the buffer.
+    """
+    if threads > 1:
+        bands = numpy.linspace(0, len(pixels), threads + 1).astype(numpy.int64)
+
+        def scatter_band(band: int):
+            start, end = bands[band], bands[band + 1]
+            in_band = (indices >= start) & (indices < end)
+            scatter_pixels(pixels[start:end], indices[in_band] - start, colors[in_band])
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(scatter_band, range(threads)))
+        return
+
+    valid = (indices >= 0) & (indices < len(pixels))
+    indices = indices[valid]
+    colors = colors[valid]
+
+    # Sorting is cheaper than a whole image sized lookup for a few pixels.
+    if len(indices) < len(pixels) // 16:
+        _, last = numpy.unique(indices[::-1], return_index=True)
+        last = len(indices) - 1 - last
+        pixels[indices[last]] = colors[last]
+        return
+
+    owner = numpy.full(len(pixels), -1, dtype=numpy.int64)
+    numpy.maximum.at(owner, indices, numpy.arange(len(indices)))
+    written = numpy.flatnonzero(owner >= 0)
+    pixels[written] = colors[owner[written]]
 
 
 def add_menu_item(self, context):
@@ -253,6 +507,7 @@ def register():
     bpy.utils.register_class(OT_ExportPixelUVLayout)
 
     bpy.types.IMAGE_MT_uvs.append(add_menu_item)
+    bpy.app.handlers.load_post.append(clear_snapshots)
 
 
 def unregister():
@@ -260,6 +515,9 @@ def unregister():
     bpy.utils.unregister_class(OT_ExportPixelUVLayout)
 
     bpy.types.IMAGE_MT_uvs.remove(add_menu_item)
+    if clear_snapshots in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_snapshots)
+    clear_snapshots()
 
 
 if __name__ == "__main__":
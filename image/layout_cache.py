@@ -0,0 +1,92 @@
+import hashlib
+import os
+import shutil
+import struct
+import tempfile
+import threading
+
+import numpy
+from . import rasterizer
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "pixel_perfect_layouts")
+DEFAULT_SIZE = 1024 * 1024 * 1024
+
+
+class LayoutCache:
+    """
+    Content addressed store of exported layout images. An entry is keyed by the hash of everything the image depends on and the least recently used entries are evicted once the cache grows beyond `max_size` bytes.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_size: int = DEFAULT_SIZE, link: bool = False) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.link = link
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_key(self, uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, transparent: bool, indexed: bool, compression: int) -> str:
+        key = hashlib.sha256()
+        key.update(struct.pack("<IIIIII", rasterizer.VERSION, width, height, transparent, indexed, compression))
+        key.update(numpy.ascontiguousarray(offsets, dtype=numpy.int64).tobytes())
+        key.update(numpy.ascontiguousarray(uvs, dtype=numpy.float32).tobytes())
+        return key.hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.png")
+
+    def fetch(self, key: str, filepath: str) -> bool:
+        """
+        Copy or link the cached image of `key` to `filepath`. Returns False if there is no entry.
+        """
+        entry = self.get_path(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+
+        temporary = f"{filepath}.tmp"
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        linked = False
+        if self.link:
+            try:
+                os.link(entry, temporary)
+                linked = True
+            except OSError:
+                pass
+        if not linked:
+            try:
+                shutil.copyfile(entry, temporary)
+            except FileNotFoundError:
+                return False
+        os.replace(temporary, filepath)
+        return True
+
+    def store(self, key: str, filepath: str):
+        temporary = f"{self.get_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(filepath, temporary)
+        os.replace(temporary, self.get_path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits into `max_size`. Entries may be removed by other threads or processes at the same time.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".png"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
@@ -0,0 +1,179 @@
+import struct
+import zlib
+
+import numpy
+
+SIGNATURE = b"\x89PNG\r\n\x1a\n"
+IDAT_SIZE = 1 << 16
+# The PNG compression in percent, the same default Blender saves images with.
+COMPRESSION = 15
+# The rows are deflated in blocks of this many rows which do not refer to each other, so a changed block can be compressed again on its own.
+BLOCK_ROWS = 32
+# A zlib stream header for a 32K window and the empty final block closing the stream.
+ZLIB_HEADER = b"\x78\x01"
+FINAL_BLOCK = b"\x03\x00"
+ADLER_BASE = 65521
+
+
+def get_level(compression: int) -> int:
+    """
+    Convert a compression in percent to a zlib level the same way Blender does.
+    """
+    return min(max(int(compression / 11.1111), 0), 9)
+
+
+def float_to_byte(pixels: numpy.ndarray) -> numpy.ndarray:
+    """
+    Convert float pixels to 8 bit the same way Blender does when saving a byte image.
+    """
+    return (numpy.clip(pixels, 0.0, 1.0) * 255 + 0.5).astype(numpy.uint8)
+
+
+def adler32_combine(adler1: int, adler2: int, length2: int) -> int:
+    """
+    Get the Adler-32 checksum of two concatenated byte strings from their checksums and the length of the second one, like zlib's `adler32_combine`.
+    """
+    remainder = length2 % ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (remainder * sum1) % ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xFFFF) + ADLER_BASE - 1) % ADLER_BASE
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + ADLER_BASE - remainder) % ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def compress_block(data: bytes, level: int) -> tuple[bytes, int, int]:
+    """
+    Deflate filtered rows on their own into raw deflate blocks ending on a byte boundary, so they can be joined with other blocks into one zlib stream.
+    Returns the compressed data, the Adler-32 checksum of `data` and its length.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH), zlib.adler32(data), len(data)
+
+
+def pack_colors(colors: numpy.ndarray) -> numpy.ndarray:
+    """
+    Pack uint8 colors of the last axis into one uint32 key per color.
+    """
+    keys = numpy.zeros(colors.shape[:-1], dtype=numpy.uint32)
+    for i in range(colors.shape[-1]):
+        keys |= colors[..., i].astype(numpy.uint32) << (8 * i)
+    return keys
+
+
+def get_palette(colors: numpy.ndarray) -> numpy.ndarray | None:
+    """
+    Get the sorted unique uint8 `colors` as palette, or None if there are too many colors for an indexed PNG.
+    """
+    _, unique = numpy.unique(pack_colors(colors), return_index=True)
+    if len(unique) > 256:
+        return None
+    return colors[unique]
+
+
+class PNGWriter:
+    """
+    Stream an 8 bit PNG to a file row strip by row strip. The rows are compressed in blocks of `BLOCK_ROWS` rows and the IDAT chunks always have the same size, so the file only depends on the rows and not on how they were split into strips.
+    With a `palette` of at most 256 `(n, channels)` uint8 colors an indexed PNG is written. Every written color has to be part of the palette.
+    `compression` is given in percent like in Blender, higher values make smaller files but take a lot longer.
+    """
+
+    def __init__(self, file, width: int, height: int, alpha: bool, palette: numpy.ndarray = None, compression: int = COMPRESSION) -> None:
+        self.file = file
+        self.width = width
+        self.height = height
+        self.channels = 4 if alpha else 3
+        self.row_size = width * (1 if palette is not None else self.channels) + 1
+        self.level = get_level(compression)
+        self.rows = bytearray()
+        self.adler = 1
+        self.buffer = bytearray(ZLIB_HEADER)
+
+        self.palette_keys = None
+        if palette is not None:
+            self.palette_keys = numpy.sort(pack_colors(palette))
+            palette = palette[numpy.argsort(pack_colors(palette))]
+            color_type = 3
+        elif alpha:
+            color_type = 6
+        else:
+            color_type = 2
+
+        self.file.write(SIGNATURE)
+        self.write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+        if palette is not None:
+            self.write_chunk(b"PLTE", palette[:, :3].tobytes())
+            if alpha:
+                self.write_chunk(b"tRNS", palette[:, 3].tobytes())
+
+    def write_chunk(self, chunk_type: bytes, data: bytes):
+        self.file.write(struct.pack(">I", len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+    def encode_rows(self, rows: numpy.ndarray) -> bytes:
+        """
+        Convert `(n, width, channels)` uint8 rows to filtered PNG scanlines.
+        """
+        if self.palette_keys is not None:
+            rows = numpy.searchsorted(self.palette_keys, pack_colors(rows)).astype(numpy.uint8)
+
+        rows = rows.reshape(len(rows), -1)
+        filtered = numpy.zeros((len(rows), rows.shape[1] + 1), dtype=numpy.uint8)
+        filtered[:, 1:] = rows
+        return filtered.tobytes()
+
+    def compress_rows(self, rows: numpy.ndarray) -> tuple[bytes, int, int]:
+        """
+        Compress at most `BLOCK_ROWS` `(n, width, channels)` uint8 rows into a block for `write_block`.
+        """
+        return compress_block(self.encode_rows(rows), self.level)
+
+    def write_rows(self, rows: numpy.ndarray):
+        """
+        Write `(n, width, channels)` uint8 rows, top row first.
+        """
+        self.rows += self.encode_rows(rows)
+        block_size = BLOCK_ROWS * self.row_size
+        while len(self.rows) >= block_size:
+            self.write_block(compress_block(bytes(self.rows[:block_size]), self.level))
+            del self.rows[:block_size]
+
+    def write_block(self, block: tuple[bytes, int, int]):
+        """
+        Write a block of `BLOCK_ROWS` rows, or fewer for the last block, compressed by `compress_rows`.
+        """
+        data, adler, length = block
+        self.buffer += data
+        self.adler = adler32_combine(self.adler, adler, length)
+        self.write_data(IDAT_SIZE)
+
+    def write_data(self, minimum: int):
+        while len(self.buffer) >= max(minimum, 1):
+            self.write_chunk(b"IDAT", bytes(self.buffer[:IDAT_SIZE]))
+            del self.buffer[:IDAT_SIZE]
+
+    def close(self):
+        if self.rows:
+            self.write_block(compress_block(bytes(self.rows), self.level))
+            self.rows.clear()
+        self.buffer += FINAL_BLOCK + struct.pack(">I", self.adler)
+        self.write_data(0)
+        self.write_chunk(b"IEND", b"")
+
+
+def write_png(filepath: str, pixels: numpy.ndarray, width: int, height: int, alpha: bool, palette: numpy.ndarray = None, compression: int = COMPRESSION):
+    """
+    Write a flat float RGBA buffer in Blender row order, bottom row first, as PNG.
+    """
+    write_png_bytes(filepath, float_to_byte(pixels), width, height, alpha, palette, compression)
+
+
+def write_png_bytes(filepath: str, pixels: numpy.ndarray, width: int, height: int, alpha: bool, palette: numpy.ndarray = None, compression: int = COMPRESSION):
+    """
+    Write a uint8 RGBA buffer in Blender row order, bottom row first, as PNG.
+    """
+    with open(filepath, "wb") as file:
+        writer = PNGWriter(file, width, height, alpha, palette, compression)
+        writer.write_rows(pixels.reshape(height, width, 4)[::-1, :, :writer.channels])
+        writer.close()
@@ -0,0 +1,131 @@
+import concurrent.futures
+
+import numpy
+
+# Increase whenever the drawn pixels change, so cached layouts are invalidated.
+VERSION = 1
+
+
+def face_sizes(offsets: numpy.ndarray) -> numpy.ndarray:
+    return numpy.diff(offsets)
+
+
+def face_sums(uvs: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Sum the UVs of every face in loop order. Summing one loop column at a time keeps the float result identical to a plain Python loop.
+    """
+    sizes = face_sizes(offsets)
+    sums = numpy.zeros((len(sizes), 2), dtype=numpy.float64)
+    for i in range(sizes.max(initial=0)):
+        faces = numpy.flatnonzero(sizes > i)
+        sums[faces] += uvs[offsets[faces] + i]
+    return sums
+
+
+def face_centers(uvs: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    sizes = face_sizes(offsets)
+    return face_sums(uvs, offsets) / numpy.maximum(sizes, 1)[:, numpy.newaxis]
+
+
+def face_edges(offsets: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Get the start and end UV index and the owning face of every edge of every face. The last loop of a face connects back to its first.
+    """
+    sizes = face_sizes(offsets)
+    edge_face = numpy.repeat(numpy.arange(len(sizes)), sizes)
+    starts = numpy.arange(offsets[-1])
+    ends = starts + 1
+    last = offsets[1:][sizes > 0] - 1
+    ends[last] = offsets[:-1][sizes > 0]
+    return starts, ends, edge_face
+
+
+def rasterize_edges(starts: numpy.ndarray, ends: numpy.ndarray, middles: numpy.ndarray, width: int, height: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Rasterize all edges at once. `starts` and `ends` are `(n, 2)` UV coordinates and `middles` the UV center of the face owning the edge. Every edge is drawn one pixel inside its face.
+    Returns the pixel index `y * width + x` of every drawn pixel and the index of the edge it belongs to, ordered by edge.
+    """
+    size = numpy.array((width, height), dtype=numpy.float64)
+    starts = numpy.asarray(starts, dtype=numpy.float64) * size
+    ends = numpy.asarray(ends, dtype=numpy.float64) * size
+    middles = numpy.asarray(middles, dtype=numpy.float64) * size
+
+    # The major axis is the one the edge is stepped along, the minor axis is interpolated.
+    major_x = numpy.abs(ends[:, 0] - starts[:, 0]) > numpy.abs(ends[:, 1] - starts[:, 1])
+    major = numpy.where(major_x, 0, 1)
+    minor = 1 - major
+    edges = numpy.arange(len(starts))
+
+    p1 = starts[edges, major]
+    q1 = starts[edges, minor]
+    p2 = ends[edges, major]
+    q2 = ends[edges, minor]
+
+    swap = p1 > p2
+    p1, p2 = numpy.where(swap, p2, p1), numpy.where(swap, p1, p2)
+    q1, q2 = numpy.where(swap, q2, q1), numpy.where(swap, q1, q2)
+
+    top = (q1 + q2) / 2 > middles[edges, minor]
+    shift = numpy.where(top, -1.01, 0.01)
+    q1 = q1 + shift
+    q2 = q2 + shift
+
+    p_start = numpy.floor(p1 + 0.01)
+    p_end = numpy.ceil(p2 - 0.01)
+
+    differs = p1 != p2
+    length = numpy.where(differs, p2 - p1, 1.0)
+    q1 = numpy.where(differs, q1 + (q2 - q1) * (p_start - p1) / length, q1)
+    q2 = numpy.where(differs, q1 + (q2 - q1) * (p_end - p1) / length, q2)
+
+    counts = numpy.maximum(p_end - p_start, 0).astype(numpy.int64)
+    pixel_edge = numpy.repeat(edges, counts)
+    steps = numpy.arange(counts.sum()) - numpy.repeat(numpy.cumsum(counts) - counts, counts)
+
+    # Top edges round up using the far side of the pixel column, bottom edges round down using the near side.
+    offset = ((q1 < q2) == top).astype(numpy.int64)
+    slope = (q2 - q1) / numpy.maximum(counts, 1)
+    q = q1[pixel_edge] + slope[pixel_edge] * (steps + offset[pixel_edge])
+    q = numpy.where(top[pixel_edge], numpy.ceil(q), numpy.floor(q)).astype(numpy.int64)
+    p = p_start.astype(numpy.int64)[pixel_edge] + steps
+
+    x = numpy.where(major_x[pixel_edge], p, q)
+    y = numpy.where(major_x[pixel_edge], q, p)
+    return y * width + x, pixel_edge
+
+
+def rasterize_faces(uvs: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, threads: int = 1) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Rasterize the border of every face given as flat `uvs` with per face `offsets`. Returns the drawn pixel indices and the face each one belongs to, ordered by face.
+    With more than one thread the faces are split into chunks which are rasterized in parallel. The result is the same.
+    """
+    uvs = numpy.asarray(uvs, dtype=numpy.float64).reshape(-1, 2)
+    face_count = len(offsets) - 1
+    if threads > 1 and face_count > threads:
+        chunks = numpy.linspace(0, face_count, threads * 4 + 1).astype(numpy.int64)
+
+        def rasterize_chunk(chunk: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+            start, end = chunks[chunk], chunks[chunk + 1]
+            chunk_offsets = offsets[start:end + 1]
+            pixel_indices, pixel_faces = rasterize_faces(uvs[chunk_offsets[0]:chunk_offsets[-1]], chunk_offsets - chunk_offsets[0], width, height)
+            return pixel_indices, pixel_faces + start
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(rasterize_chunk, range(len(chunks) - 1)))
+        return numpy.concatenate([result[0] for result in results]), numpy.concatenate([result[1] for result in results])
+
+    starts, ends, edge_face = face_edges(offsets)
+    middles = face_centers(uvs, offsets)
+    pixel_indices, pixel_edge = rasterize_edges(uvs[starts], uvs[ends], middles[edge_face], width, height)
+    return pixel_indices, edge_face[pixel_edge]
+
+
+def face_colors(uvs: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Get the RGBA color of every face. Red and green are the clamped UV center of the face.
+    """
+    uvs = numpy.asarray(uvs, dtype=numpy.float64).reshape(-1, 2)
+    colors = numpy.zeros((len(offsets) - 1, 4), dtype=numpy.float32)
+    colors[:, :2] = numpy.clip(face_centers(uvs, offsets), 0.0, 1.0)
+    colors[:, 3] = 1.0
+    return colors
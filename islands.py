@@ -0,0 +1,103 @@
+import bpy
+import numpy
+from . import helper, mesh_cache, mesh_geometry
+
+# UVs of the same vertex which differ by at most this on both axes are connected, the same limit Blender uses to select UV islands.
+UV_LIMIT = 0.0001
+
+
+class UVIslands:
+    """
+    The UV islands of all faces of a mesh. Two loops are in the same island if they belong to the same face, or if they share a vertex and their UVs differ by at most `limit` on both axes.
+    `loop_islands` and `face_islands` hold the island of every loop and polygon of the mesh, `min` and `max` the UV bounds of every island and `loops` the loop indices of all islands, split by `offsets`.
+    """
+
+    def __init__(self, loop_vertices: numpy.ndarray, uvs: numpy.ndarray, loop_indices: numpy.ndarray, offsets: numpy.ndarray, limit: float = UV_LIMIT) -> None:
+        loop_count = len(loop_vertices)
+        face_sizes = numpy.diff(offsets)
+        loop_faces = numpy.repeat(numpy.arange(len(face_sizes)), face_sizes)
+
+        # Join every loop with the first loop of its face and with every loop of its vertex which UV is close enough.
+        first_loops = loop_indices[offsets[:-1]][loop_faces]
+        a, b = helper.get_group_pairs(loop_vertices)
+        close = (a < b) & numpy.all(numpy.abs(uvs[a] - uvs[b]) <= limit, axis=1)
+        self.loop_islands = helper.connected_components(
+            loop_count,
+            numpy.concatenate((loop_indices, a[close])),
+            numpy.concatenate((first_loops, b[close]))
+        )
+        self.face_islands = self.loop_islands[loop_indices[offsets[:-1]]]
+        self.count = int(self.loop_islands.max(initial=-1)) + 1
+
+        self.loops = numpy.argsort(self.loop_islands, kind="stable")
+        self.offsets = numpy.zeros(self.count + 1, dtype=numpy.int64)
+        self.offsets[1:] = numpy.cumsum(numpy.bincount(self.loop_islands, minlength=self.count))
+
+        # Every island has at least one loop, so the bounds can be reduced over the sorted loops.
+        island_uvs = uvs[self.loops]
+        self.min = numpy.minimum.reduceat(island_uvs, self.offsets[:-1]) if self.count else numpy.zeros((0, 2), dtype=uvs.dtype)
+        self.max = numpy.maximum.reduceat(island_uvs, self.offsets[:-1]) if self.count else numpy.zeros((0, 2), dtype=uvs.dtype)
+
+    def get_loops(self, island: int) -> numpy.ndarray:
+        return self.loops[self.offsets[island]:self.offsets[island + 1]]
+
+    def get_islands(self, loops: numpy.ndarray) -> numpy.ndarray:
+        """
+        Get the sorted islands which contain any of the `loops`.
+        """
+        return numpy.unique(self.loop_islands[loops])
+
+    def get_island_loops(self, islands: numpy.ndarray) -> numpy.ndarray:
+        """
+        Get all loops of several islands, island by island.
+        """
+        loop_indices, _ = helper.loop_ranges(self.offsets[:-1][islands], numpy.diff(self.offsets)[islands])
+        return self.loops[loop_indices]
+
+
+# The islands of every mesh and UV layer.
+island_cache = mesh_cache.MeshCache()
+
+
+def get_islands(mesh_data: bpy.types.Mesh, uv_layer: bpy.types.MeshUVLoopLayer = None) -> UVIslands:
+    """
+    Get the islands of a UV layer, by default the active one, of a mesh, read from its current arrays. They are only built again if the faces, the vertices of their loops or the UVs changed.
+    """
+    if uv_layer is None:
+        uv_layer = mesh_data.uv_layers.active
+
+    _, loop_indices, offsets = helper.get_mesh_faces(mesh_data, selected_only=False)
+    loop_vertices = mesh_geometry.get_loop_vertices(mesh_data)
+    uvs = helper.get_layer_uvs(mesh_data, uv_layer)
+    return island_cache.get(
+        mesh_data,
+        (loop_indices, offsets, loop_vertices, uvs),
+        lambda: UVIslands(loop_vertices, uvs, loop_indices, offsets),
+        uv_layer.name
+    )
+
+
+def snap_islands(uvs: numpy.ndarray, loop_vertices: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, selected: numpy.ndarray = None, loop_islands: numpy.ndarray = None) -> numpy.ndarray:
+    """
+    Move every island of the faces given by flat `uvs` with their `loop_vertices` and per face `offsets` as a whole, so the lower left corner of its bounds lands on the closest pixel corner.
+    With a `selected` mask only the selected UVs are moved and the bounds are taken from them. The island of every loop can be passed as `loop_islands`, e.g. from the cached islands of the whole mesh, instead of building the islands of the faces.
+    """
+    uvs = numpy.asarray(uvs, dtype=numpy.float64)
+    if selected is None:
+        selected = numpy.ones(len(uvs), dtype=bool)
+    if loop_islands is None:
+        loop_islands = UVIslands(loop_vertices, uvs, numpy.arange(len(uvs)), offsets).loop_islands
+
+    loops = numpy.flatnonzero(selected)
+    if len(loops) == 0:
+        return uvs
+    loops = loops[numpy.argsort(loop_islands[loops], kind="stable")]
+    sorted_islands = loop_islands[loops]
+    starts = numpy.flatnonzero(numpy.diff(sorted_islands, prepend=-1))
+    corners = numpy.minimum.reduceat(uvs[loops], starts)
+
+    moves = numpy.zeros((int(sorted_islands[-1]) + 1, 2), dtype=numpy.float64)
+    moves[sorted_islands[starts]] = helper.closest_pixels(corners, width, height) - corners
+    snapped = uvs.copy()
+    snapped[selected] += moves[loop_islands[selected]]
+    return snapped
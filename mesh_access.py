@@ -0,0 +1,140 @@
+import bmesh
+import bpy
+import numpy
+from . import helper
+
+
+class MeshAccess:
+    """
+    Bulk access to the selected or all faces of a mesh object without switching between object and edit mode.
+    In edit mode the mesh is updated from the edit mesh once, so the bulk arrays can be read from it, and changes are written to the edit mesh and pushed with `bmesh.update_edit_mesh`.
+    """
+
+    def __init__(self, mesh_object: bpy.types.Object, selected_only: bool = True) -> None:
+        self.mesh_data: bpy.types.Mesh = mesh_object.data
+        self.bmesh = None
+        helper.update_mesh(mesh_object)
+        if self.mesh_data.is_editmode:
+            self.bmesh = bmesh.from_edit_mesh(self.mesh_data)
+
+        self.polygons, self.loop_indices, self.offsets = helper.get_mesh_faces(self.mesh_data, selected_only)
+
+    def restrict(self, faces: numpy.ndarray):
+        """
+        Only access a subset of the faces, given by their indices into `polygons`.
+        """
+        loop_positions, self.offsets = helper.loop_ranges(self.offsets[:-1][faces], numpy.diff(self.offsets)[faces])
+        self.polygons = self.polygons[faces]
+        self.loop_indices = self.loop_indices[loop_positions]
+
+    def get_uvs(self, uv_layer: bpy.types.MeshUVLoopLayer) -> numpy.ndarray:
+        """
+        Get the `(n, 2)` float32 UVs of all loops of the faces.
+        """
+        return helper.get_layer_uvs(self.mesh_data, uv_layer)[self.loop_indices]
+
+    def set_uvs(self, uv_layer: bpy.types.MeshUVLoopLayer, uvs: numpy.ndarray):
+        """
+        Set the UVs of all loops of the faces. In edit mode only the loops of the faces are touched.
+        """
+        if self.bmesh is None:
+            layer_uvs = helper.get_layer_uvs(self.mesh_data, uv_layer)
+            layer_uvs[self.loop_indices] = uvs
+            helper.set_layer_uvs(uv_layer, layer_uvs)
+            return
+
+        # The edit mesh faces and their loops are in the order of the updated mesh.
+        layer = self.bmesh.loops.layers.uv[uv_layer.name]
+        self.bmesh.faces.ensure_lookup_table()
+        faces = self.bmesh.faces
+        face_uvs = iter(numpy.asarray(uvs, dtype=numpy.float64).tolist())
+        for polygon in self.polygons.tolist():
+            for loop in faces[polygon].loops:
+                loop[layer].uv = next(face_uvs)
+        bmesh.update_edit_mesh(self.mesh_data, loop_triangles=False, destructive=False)
+
+    def get_selection(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Get the selection state of all vertices, edges and polygons of the mesh.
+        """
+        return (
+            helper.get_bools(self.mesh_data.vertices, "select"),
+            helper.get_bools(self.mesh_data.edges, "select"),
+            helper.get_bools(self.mesh_data.polygons, "select")
+        )
+
+    def set_selection(self, vertices: numpy.ndarray, edges: numpy.ndarray, polygons: numpy.ndarray):
+        """
+        Set the selection state of all vertices, edges and polygons of the mesh.
+        In edit mode the elements are written one by one, but only the deselected and newly selected ones and the kept ones a deselection reaches.
+        """
+        if self.bmesh is None:
+            self.mesh_data.vertices.foreach_set("select", vertices)
+            self.mesh_data.edges.foreach_set("select", edges)
+            self.mesh_data.polygons.foreach_set("select", polygons)
+            return
+
+        old_vertices, old_edges, old_polygons = self.get_selection()
+        sequences = (self.bmesh.faces, self.bmesh.edges, self.bmesh.verts)
+        for sequence in sequences:
+            sequence.ensure_lookup_table()
+
+        for sequence, old, new in zip(sequences, (old_polygons, old_edges, old_vertices), (polygons, edges, vertices)):
+            for index in numpy.flatnonzero(old & ~new).tolist():
+                sequence[index].select = False
+
+        # Deselecting an edge also deselects its vertices, and deselecting a face its edges and vertices. Only kept elements among those are selected again.
+        reached_vertices = ~old_vertices
+        reached_edges = ~old_edges
+        edge_vertices = numpy.zeros(len(edges) * 2, dtype=numpy.int32)
+        self.mesh_data.edges.foreach_get("vertices", edge_vertices)
+        reached_vertices[edge_vertices.reshape(-1, 2)[old_edges & ~edges]] = True
+        loop_start = numpy.zeros(len(polygons), dtype=numpy.int32)
+        loop_total = numpy.zeros(len(polygons), dtype=numpy.int32)
+        self.mesh_data.polygons.foreach_get("loop_start", loop_start)
+        self.mesh_data.polygons.foreach_get("loop_total", loop_total)
+        deselected = old_polygons & ~polygons
+        loops, _ = helper.loop_ranges(loop_start[deselected], loop_total[deselected])
+        reached_vertices[helper.get_loop_vertices(self.mesh_data)[loops]] = True
+        reached_edges[helper.get_loop_edges(self.mesh_data)[loops]] = True
+
+        for sequence, new in zip(reversed(sequences), (vertices & reached_vertices, edges & reached_edges, polygons & ~old_polygons)):
+            for index in numpy.flatnonzero(new).tolist():
+                sequence[index].select = True
+
+        self.bmesh.select_flush_mode()
+        bmesh.update_edit_mesh(self.mesh_data, loop_triangles=False, destructive=False)
+
+    def get_face_attribute(self, name: str) -> numpy.ndarray:
+        """
+        Get the values of an integer face attribute of the faces, or None if the mesh has no such attribute.
+        """
+        attribute = self.mesh_data.attributes.get(name)
+        if attribute is None:
+            return None
+        values = numpy.zeros(len(self.mesh_data.polygons), dtype=numpy.int32)
+        attribute.data.foreach_get("value", values)
+        return values[self.polygons]
+
+    def set_face_attribute(self, name: str, values: numpy.ndarray):
+        """
+        Set the values of an integer face attribute of the faces. The attribute is added if the mesh has none, with 0 for all other faces.
+        """
+        if self.bmesh is None:
+            attribute = self.mesh_data.attributes.get(name)
+            if attribute is None:
+                attribute = self.mesh_data.attributes.new(name, "INT", "FACE")
+            all_values = numpy.zeros(len(self.mesh_data.polygons), dtype=numpy.int32)
+            attribute.data.foreach_get("value", all_values)
+            all_values[self.polygons] = values
+            attribute.data.foreach_set("value", all_values)
+            return
+
+        layer = self.bmesh.faces.layers.int.get(name)
+        if layer is None:
+            layer = self.bmesh.faces.layers.int.new(name)
+        self.bmesh.faces.ensure_lookup_table()
+        faces = self.bmesh.faces
+        for polygon, value in zip(self.polygons.tolist(), numpy.asarray(values).tolist()):
+            faces[polygon][layer] = value
+        bmesh.update_edit_mesh(self.mesh_data, loop_triangles=False, destructive=False)
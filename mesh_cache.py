@@ -0,0 +1,55 @@
+import hashlib
+from typing import Callable
+
+import bpy
+import numpy
+
+
+def get_fingerprint(arrays: tuple) -> bytes:
+    """
+    Hash the content of all `arrays` into one digest.
+    """
+    fingerprint = hashlib.sha1()
+    for array in arrays:
+        fingerprint.update(numpy.ascontiguousarray(array).tobytes())
+    return fingerprint.digest()
+
+
+class MeshCache:
+    """
+    Data built from the arrays of a mesh, kept per mesh and name while the fingerprint of the arrays does not change.
+    Entries of meshes which are no longer in the file are dropped whenever something has to be built.
+    """
+
+    def __init__(self) -> None:
+        self.entries: dict[tuple[int, str], tuple[bytes, object]] = {}
+
+    def get(self, mesh_data: bpy.types.Mesh, arrays: tuple, build: Callable[[], object], name: str = ""):
+        """
+        Get the data of a mesh, built by `build` if the `arrays` it is built from changed since the last call.
+        """
+        key = (mesh_data.session_uid, name)
+        fingerprint = get_fingerprint(arrays)
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        self.evict()
+        data = build()
+        self.entries[key] = (fingerprint, data)
+        return data
+
+    def evict(self):
+        """
+        Drop the entries of all deleted meshes. Session ids are never reused, so neither renamed meshes nor loading another file mix up entries.
+        """
+        session_uids = {mesh_data.session_uid for mesh_data in bpy.data.meshes}
+        for key in [key for key in self.entries if key[0] not in session_uids]:
+            del self.entries[key]
+
+    def discard(self, session_uid: int):
+        """
+        Drop all entries of the mesh with the session id `session_uid`.
+        """
+        for key in [key for key in self.entries if key[0] == session_uid]:
+            del self.entries[key]
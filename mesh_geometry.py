@@ -0,0 +1,63 @@
+from typing import Callable
+
+import bpy
+import numpy
+from . import helper, mesh_cache
+
+# The geometry arrays of every mesh read in object mode, by name. They are dropped by every geometry update of the mesh.
+geometry_cache = mesh_cache.MeshCache()
+
+
+def get_array(mesh_data: bpy.types.Mesh, name: str, read: Callable[[bpy.types.Mesh], numpy.ndarray]) -> numpy.ndarray:
+    """
+    Get a geometry array of a mesh, read by `read` on first use. The array is shared between runs and must not be changed.
+    In edit mode the mesh is written from the edit mesh on every run, so the array is read every time.
+    """
+    if mesh_data.is_editmode:
+        return read(mesh_data)
+    # The element counts catch changes that no depsgraph update reported, like a topology change by a script.
+    counts = numpy.array((len(mesh_data.vertices), len(mesh_data.edges), len(mesh_data.loops), len(mesh_data.polygons)))
+    arrays = geometry_cache.get(mesh_data, (counts,), dict)
+    array = arrays.get(name)
+    if array is None:
+        array = read(mesh_data)
+        arrays[name] = array
+    return array
+
+
+def get_vertex_coordinates(mesh_data: bpy.types.Mesh) -> numpy.ndarray:
+    return get_array(mesh_data, "coordinates", helper.get_vertex_coordinates)
+
+
+def get_loop_vertices(mesh_data: bpy.types.Mesh) -> numpy.ndarray:
+    return get_array(mesh_data, "loop_vertices", helper.get_loop_vertices)
+
+
+def get_loop_edges(mesh_data: bpy.types.Mesh) -> numpy.ndarray:
+    return get_array(mesh_data, "loop_edges", helper.get_loop_edges)
+
+
+def get_polygon_vectors(mesh_data: bpy.types.Mesh, attribute: str) -> numpy.ndarray:
+    return get_array(mesh_data, attribute, lambda mesh_data: helper.get_polygon_vectors(mesh_data, attribute))
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        changed = update.id.original
+        if isinstance(changed, bpy.types.Object) and changed.type == "MESH":
+            changed = changed.data
+        if isinstance(changed, bpy.types.Mesh):
+            geometry_cache.discard(changed.session_uid)
+
+
+def register():
+    bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+
+
+def unregister():
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    geometry_cache.entries.clear()
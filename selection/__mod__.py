@@ -1,10 +1,12 @@
 import bpy
-from . import isolate_selection_by_direction
+from . import isolate_selection_by_direction, split_by_direction
 
 
 def register():
     isolate_selection_by_direction.register()
+    split_by_direction.register()
 
 
 def unregister():
+    split_by_direction.unregister()
     isolate_selection_by_direction.unregister()
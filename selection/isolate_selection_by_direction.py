@@ -1,44 +1,88 @@
 import bpy
 import math
+import numpy
+from .. import face_adjacency, helper, mesh_access, mesh_geometry
+
+
+def get_facing(normals: numpy.ndarray, direction: numpy.ndarray, max_angle: float) -> numpy.ndarray:
+    """
+    Test which of the `(n, 3)` normals are within `max_angle` of `direction` by comparing their dot product with the cosine of the angle. Like `Vector.angle` with a fallback of 0, a zero vector faces every direction.
+    """
+    if max_angle < 0:
+        return numpy.zeros(len(normals), dtype=bool)
+    length = numpy.linalg.norm(normals, axis=1) * numpy.linalg.norm(direction)
+    # The tolerance keeps faces at exactly the max angle, like 45° bevels, which the float angle may put on either side.
+    return (length == 0) | (normals @ direction >= (math.cos(min(max_angle, math.pi)) - 1e-6) * length)
+
+
+def get_isolated_selection(kept: numpy.ndarray, polygons: numpy.ndarray, loop_indices: numpy.ndarray, offsets: numpy.ndarray, loop_vertices: numpy.ndarray, loop_edges: numpy.ndarray, vertex_count: int, edge_count: int, polygon_count: int) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Keep the `kept` ones of the selected `polygons`. Returns the new selection of all vertices, edges and polygons, in which only the kept polygons and their vertices and edges are selected.
+    """
+    kept_loops = loop_indices[numpy.repeat(kept, numpy.diff(offsets))]
+
+    vertices = numpy.zeros(vertex_count, dtype=bool)
+    vertices[loop_vertices[kept_loops]] = True
+    edges = numpy.zeros(edge_count, dtype=bool)
+    edges[loop_edges[kept_loops]] = True
+    selected_polygons = numpy.zeros(polygon_count, dtype=bool)
+    selected_polygons[polygons[kept]] = True
+    return vertices, edges, selected_polygons
+
+
+def get_selection_arrays(mesh: mesh_access.MeshAccess) -> tuple:
+    """
+    Get the arrays of the selected faces of a mesh `get_isolated_selection` needs besides the kept faces.
+    """
+    mesh_data = mesh.mesh_data
+    return (
+        mesh.polygons,
+        mesh.loop_indices,
+        mesh.offsets,
+        mesh_geometry.get_loop_vertices(mesh_data),
+        mesh_geometry.get_loop_edges(mesh_data),
+        len(mesh_data.vertices),
+        len(mesh_data.edges),
+        len(mesh_data.polygons)
+    )
 
 
 class OT_IsolateSelectionByDirection(bpy.types.Operator):
     bl_idname = "uv.isolate_selection_by_direction"
     bl_label = "Isolate by Direction"
     bl_options = {"REGISTER", "UNDO"}
-    bl_description = "Use a vector as normal for a projection plane. From all selected faces isolate those who are facing the plane with a defined angle or narrower"
+    bl_description = "Use a vector as normal for a projection plane. From all selected faces isolate those who are facing the plane with a defined angle or narrower. With Grow Region all faces connected to them which face the plane are selected as well"
 
     vector: bpy.props.FloatVectorProperty(name="Direction", description="The direction of the projection plane normal", default=(0, 0, 0))
     max_angle: bpy.props.FloatProperty(name="Max Angle", description="The maximum angle a face normal is valid", default=math.pi/4, soft_min=0.0, unit="ROTATION")
+    grow: bpy.props.BoolProperty(name="Grow Region", description="Grow from the selected faces over all connected faces facing the plane, instead of only keeping selected ones", default=False)
 
     def execute(self, context):
-        bpy.ops.object.mode_set(mode='OBJECT')
-        v = self.vector
-
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
-            selected_polygons = []
-            polygons: bpy.types.MeshPolygons = selected_object.data.polygons
-            for polygon in polygons:
-                if polygon.select:
-                    n = polygon.normal
-                    angle = n.angle(v, 0)
-                    if angle <= self.max_angle:
-                        selected_polygons.append(polygon)
-                    polygon.select = False
-
-            vertices: bpy.types.MeshVertices = selected_object.data.vertices
-            for vertex in vertices:
-                vertex.select = False
-            edges: bpy.types.MeshVertices = selected_object.data.edges
-            for edge in edges:
-                edge.select = False
-
-            for polygon in selected_polygons:
-                polygon.select = True
-
-        bpy.ops.object.mode_set(mode='EDIT')
+        direction = numpy.array(self.vector, dtype=numpy.float64)
+        max_angle = self.max_angle
+        grow = self.grow
+
+        meshes = []
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
+            # Growing works on all faces, the selected ones are only the seeds.
+            mesh = mesh_access.MeshAccess(selected_object, selected_only=not grow)
+            region = None
+            if grow:
+                region = (face_adjacency.get_face_adjacency(mesh.mesh_data), helper.get_bools(mesh.mesh_data.polygons, "select"), helper.get_bools(mesh.mesh_data.polygons, "hide"))
+            meshes.append((mesh, (mesh_geometry.get_polygon_vectors(mesh.mesh_data, "normal"), region) + get_selection_arrays(mesh)))
+
+        def isolate(normals, region, polygons, *arrays):
+            facing = get_facing(normals[polygons], direction, max_angle)
+            if region is not None:
+                adjacency, seeds, hidden = region
+                facing = adjacency.grow(seeds, facing & ~hidden)
+            return get_isolated_selection(facing, polygons, *arrays)
+
+        selections = helper.map_threads(isolate, *zip(*[arrays for _, arrays in meshes]))
+        for (mesh, _), selection in zip(meshes, selections):
+            mesh.set_selection(*selection)
+
+        helper.report_shared_meshes(self, context.selected_objects)
         return {'FINISHED'}
 
 
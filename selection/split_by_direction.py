@@ -0,0 +1,128 @@
+import bpy
+import math
+import numpy
+from .. import helper, mesh_access, mesh_geometry
+from . import isolate_selection_by_direction
+
+# The integer face attribute Split by Direction stores the direction group of every face in. 0 is no group, every other value is the index into `DIRECTION_GROUPS` plus one.
+ATTRIBUTE_NAME = "pixel_perfect_direction"
+
+DIRECTION_GROUPS = [
+    ("POSITIVE_X", "+ X", (1, 0, 0)),
+    ("POSITIVE_Y", "+ Y", (0, 1, 0)),
+    ("POSITIVE_Z", "+ Z", (0, 0, 1)),
+    ("NEGATIVE_X", "- X", (-1, 0, 0)),
+    ("NEGATIVE_Y", "- Y", (0, -1, 0)),
+    ("NEGATIVE_Z", "- Z", (0, 0, -1)),
+    ("CUSTOM", "Custom", None),
+]
+
+
+def get_direction_groups(normals: numpy.ndarray, directions: numpy.ndarray, max_angle: float) -> numpy.ndarray:
+    """
+    Assign every normal to its closest direction in one pass. Returns the attribute value of every normal, the direction index plus one, or 0 if no direction is within `max_angle`.
+    Zero directions are never closest and zero normals get no group.
+    """
+    direction_lengths = numpy.linalg.norm(directions, axis=1)
+    directions = directions / numpy.where(direction_lengths > 0, direction_lengths, 1)[:, numpy.newaxis]
+    normal_lengths = numpy.linalg.norm(normals, axis=1)
+    dots = (normals @ directions.T) / numpy.where(normal_lengths > 0, normal_lengths, 1)[:, numpy.newaxis]
+    dots[:, direction_lengths == 0] = -numpy.inf
+
+    closest = numpy.argmax(dots, axis=1)
+    closest_dots = dots[numpy.arange(len(normals)), closest]
+    # The same tolerance as Isolate by Direction, so a face exactly at the max angle is in the group.
+    within = (closest_dots >= math.cos(min(max_angle, math.pi)) - 1e-6) & (normal_lengths > 0) & (max_angle >= 0)
+    return numpy.where(within, closest + 1, 0).astype(numpy.int32)
+
+
+class OT_SplitByDirection(bpy.types.Operator):
+    bl_idname = "uv.split_by_direction"
+    bl_label = "Split by Direction"
+    bl_options = {"REGISTER", "UNDO"}
+    bl_description = "Assign every selected face to the direction of ±X, ±Y, ±Z and an optional custom one its normal is closest to. The group is stored in a face attribute, so it can be isolated later without comparing angles again"
+
+    use_custom: bpy.props.BoolProperty(name="Custom Direction", description="Add the custom direction to the directions the faces are split by", default=False)
+    vector: bpy.props.FloatVectorProperty(name="Direction", description="The custom direction", default=(1, 1, 1))
+    max_angle: bpy.props.FloatProperty(name="Max Angle", description="The maximum angle between a face normal and its closest direction. Faces with a wider angle get no group", default=math.pi/2, soft_min=0.0, unit="ROTATION")
+
+    def execute(self, context):
+        directions = [vector for _, _, vector in DIRECTION_GROUPS[:-1]]
+        if self.use_custom:
+            directions.append(tuple(self.vector))
+        directions = numpy.array(directions, dtype=numpy.float64)
+
+        # Ties go to the first direction, so a custom direction along an axis never gets a face.
+        if self.use_custom:
+            custom = directions[-1] / max(numpy.linalg.norm(directions[-1]), 1e-12)
+            same = [name for (_, name, _), dot in zip(DIRECTION_GROUPS, directions[:-1] @ custom) if dot >= 1 - 1e-6]
+            if same:
+                self.report({'WARNING'}, f"The custom direction is the same as {same[0]} and gets no faces")
+            elif not directions[-1].any():
+                self.report({'WARNING'}, "The custom direction is zero and gets no faces")
+        max_angle = self.max_angle
+
+        meshes = []
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
+            mesh = mesh_access.MeshAccess(selected_object)
+            meshes.append((mesh, mesh_geometry.get_polygon_vectors(mesh.mesh_data, "normal")[mesh.polygons]))
+
+        groups = helper.map_threads(lambda normals: get_direction_groups(normals, directions, max_angle), [normals for _, normals in meshes])
+        counts = numpy.zeros(len(DIRECTION_GROUPS) + 1, dtype=numpy.int64)
+        for (mesh, _), mesh_groups in zip(meshes, groups):
+            mesh.set_face_attribute(ATTRIBUTE_NAME, mesh_groups)
+            counts += numpy.bincount(mesh_groups, minlength=len(counts))
+
+        split = ", ".join(f"{name}: {count}" for (_, name, _), count in zip(DIRECTION_GROUPS, counts[1:].tolist()) if count)
+        self.report({'INFO'}, f"Split faces by direction: {split or 'none'}" + (f", no group: {counts[0]}" if counts[0] else ""))
+        helper.report_shared_meshes(self, context.selected_objects)
+        return {'FINISHED'}
+
+
+class OT_IsolateSelectionByGroup(bpy.types.Operator):
+    bl_idname = "uv.isolate_selection_by_group"
+    bl_label = "Isolate by Split Group"
+    bl_options = {"REGISTER", "UNDO"}
+    bl_description = "From all selected faces isolate those Split by Direction assigned to a direction"
+
+    group: bpy.props.EnumProperty(name="Direction", description="The direction group to isolate", items=[(identifier, name, "") for identifier, name, _ in DIRECTION_GROUPS], default="POSITIVE_X")
+
+    def execute(self, context):
+        value = [identifier for identifier, _, _ in DIRECTION_GROUPS].index(self.group) + 1
+
+        meshes = []
+        unsplit = 0
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
+            mesh = mesh_access.MeshAccess(selected_object)
+            groups = mesh.get_face_attribute(ATTRIBUTE_NAME)
+            if groups is None:
+                unsplit += 1
+                groups = numpy.zeros(len(mesh.polygons), dtype=numpy.int32)
+            meshes.append((mesh, (groups == value,) + isolate_selection_by_direction.get_selection_arrays(mesh)))
+
+        selections = helper.map_threads(isolate_selection_by_direction.get_isolated_selection, *zip(*[arrays for _, arrays in meshes]))
+        for (mesh, _), selection in zip(meshes, selections):
+            mesh.set_selection(*selection)
+
+        if unsplit:
+            self.report({'WARNING'}, f"{unsplit} meshes are not split by direction yet")
+        helper.report_shared_meshes(self, context.selected_objects)
+        return {'FINISHED'}
+
+
+def add_menu_item(self: bpy.types.Menu, context):
+    self.layout.separator()
+    self.layout.operator(OT_SplitByDirection.bl_idname)
+    self.layout.operator_menu_enum(OT_IsolateSelectionByGroup.bl_idname, "group", text=OT_IsolateSelectionByGroup.bl_label)
+
+
+def register():
+    bpy.utils.register_class(OT_SplitByDirection)
+    bpy.utils.register_class(OT_IsolateSelectionByGroup)
+    isolate_selection_by_direction.VIEW3D_MT_IsolateSelectionByDirection.append(add_menu_item)
+
+
+def unregister():
+    bpy.utils.unregister_class(OT_SplitByDirection)
+    bpy.utils.unregister_class(OT_IsolateSelectionByGroup)
+    isolate_selection_by_direction.VIEW3D_MT_IsolateSelectionByDirection.remove(add_menu_item)
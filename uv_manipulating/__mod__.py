@@ -1,5 +1,5 @@
 import bpy
-from . import move_uv_to_closest_pixel, rotate_uvs_to_closest_orthogonal, mirror_uv_around_vertex
+from . import move_uv_to_closest_pixel, rotate_uvs_to_closest_orthogonal, mirror_uv_around_vertex, snap_uvs_to_pixels
 
 
 def add_menu_item(self, context):
@@ -7,12 +7,14 @@ def add_menu_item(self, context):
     self.layout.operator(move_uv_to_closest_pixel.OT_MoveUVToClosestPixel.bl_idname, icon="TRANSFORM_ORIGINS")
     self.layout.operator(rotate_uvs_to_closest_orthogonal.OT_RotateUVsToClosestOrthogonal.bl_idname, icon="DRIVER_ROTATIONAL_DIFFERENCE")
     self.layout.operator(mirror_uv_around_vertex.OT_MirrorUVAroundVertex.bl_idname, icon="MOD_MIRROR")
+    self.layout.operator(snap_uvs_to_pixels.OT_SnapUVsToPixels.bl_idname, icon="SNAP_GRID")
 
 
 def register():
     move_uv_to_closest_pixel.register()
     mirror_uv_around_vertex.register()
     rotate_uvs_to_closest_orthogonal.register()
+    snap_uvs_to_pixels.register()
 
     bpy.types.IMAGE_MT_uvs_snap.append(add_menu_item)
 
@@ -21,5 +23,6 @@ def unregister():
     move_uv_to_closest_pixel.unregister()
     mirror_uv_around_vertex.unregister()
     rotate_uvs_to_closest_orthogonal.unregister()
+    snap_uvs_to_pixels.unregister()
 
     bpy.types.IMAGE_MT_uvs_snap.remove(add_menu_item)
@@ -4,7 +4,6 @@ import mathutils
 import math
 import gpu
 from gpu_extras.batch import batch_for_shader
-from sys import float_info
 from .. import helper
 
 
@@ -17,6 +16,7 @@ class OT_MirrorUVAroundVertex(bpy.types.Operator):
     def __init__(self) -> None:
         self.uvs = []
         self.edges = []
+        self.uv_tree = None
         self.pressed_left = False
         super().__init__()
 
@@ -29,9 +29,7 @@ class OT_MirrorUVAroundVertex(bpy.types.Operator):
     def get_uvs(self, context):
         self.uvs.clear()
         self.edges.clear()
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
             mesh: bpy.types.Mesh = selected_object.data
             bm = bmesh.from_edit_mesh(mesh)
             uv_layer = bm.loops.layers.uv.verify()
@@ -47,17 +45,12 @@ class OT_MirrorUVAroundVertex(bpy.types.Operator):
                             self.edges.append(mathutils.Vector(uv.uv))
                     old_uv = uv
 
+        self.uv_tree = helper.get_uv_tree(self.uvs)
+
     def get_selected(self, context, event):
         mouse = mathutils.Vector(context.region.view2d.region_to_view(event.mouse_region_x, event.mouse_region_y))
-        distance = float_info.max
-        selected_uv = self.uvs[0]
-        for uv in self.uvs:
-            new_distance = (mouse-uv).length_squared
-            if new_distance < distance:
-                distance = new_distance
-                selected_uv = uv
-
-        self.selected_uv = selected_uv
+        index = helper.find_closest_uv(self.uv_tree, mouse)
+        self.selected_uv = self.uvs[index] if index is not None else mathutils.Vector((0, 0))
 
     def get_axis(self, context, event):
         mouse = mathutils.Vector(context.region.view2d.region_to_view(event.mouse_region_x, event.mouse_region_y)) - self.selected_uv
@@ -137,9 +130,7 @@ class OT_MirrorUVAroundVertex(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
             mesh: bpy.types.Mesh = selected_object.data
             bm = bmesh.from_edit_mesh(mesh)
             uv_layer = bm.loops.layers.uv.verify()
@@ -150,8 +141,9 @@ class OT_MirrorUVAroundVertex(bpy.types.Operator):
                     if uv.select:
                         uv.uv = (uv.uv - self.selected_uv) * self. axis + self.selected_uv
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.mode_set(mode='EDIT')
+            bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+        helper.report_shared_meshes(self, context.selected_objects)
         return {"FINISHED"}
 
 
@@ -4,7 +4,6 @@ import mathutils
 import math
 import gpu
 from gpu_extras.batch import batch_for_shader
-from sys import float_info
 from .. import helper
 
 
@@ -17,6 +16,7 @@ class OT_MoveUVToClosestPixel(bpy.types.Operator):
     def __init__(self) -> None:
         self.uvs = []
         self.edges = []
+        self.uv_tree = None
         self.pressed_left = False
         super().__init__()
 
@@ -29,9 +29,7 @@ class OT_MoveUVToClosestPixel(bpy.types.Operator):
     def get_uvs(self, context):
         self.uvs.clear()
         self.edges.clear()
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
             mesh: bpy.types.Mesh = selected_object.data
             bm = bmesh.from_edit_mesh(mesh)
             uv_layer = bm.loops.layers.uv.verify()
@@ -47,17 +45,12 @@ class OT_MoveUVToClosestPixel(bpy.types.Operator):
                             self.edges.append(mathutils.Vector(uv.uv))
                     old_uv = uv
 
+        self.uv_tree = helper.get_uv_tree(self.uvs)
+
     def get_closest(self, context, event):
         mouse = mathutils.Vector(context.region.view2d.region_to_view(event.mouse_region_x, event.mouse_region_y))
-        distance = float_info.max
-        closest_uv = self.uvs[0]
-        for uv in self.uvs:
-            new_distance = (mouse-uv).length_squared
-            if new_distance < distance:
-                distance = new_distance
-                closest_uv = uv
-
-        self.closest_uv = closest_uv
+        index = helper.find_closest_uv(self.uv_tree, mouse)
+        self.closest_uv = self.uvs[index] if index is not None else mathutils.Vector((0, 0))
 
     def get_move(self, context, event):
         mouse = mathutils.Vector(context.region.view2d.region_to_view(event.mouse_region_x, event.mouse_region_y))
@@ -126,9 +119,7 @@ class OT_MoveUVToClosestPixel(bpy.types.Operator):
         return {'RUNNING_MODAL'}
 
     def execute(self, context):
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
             mesh: bpy.types.Mesh = selected_object.data
             bm = bmesh.from_edit_mesh(mesh)
             uv_layer = bm.loops.layers.uv.verify()
@@ -139,8 +130,9 @@ class OT_MoveUVToClosestPixel(bpy.types.Operator):
                     if uv.select:
                         uv.uv += self.move
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.mode_set(mode='EDIT')
+            bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+        helper.report_shared_meshes(self, context.selected_objects)
         return {"FINISHED"}
 
 
@@ -4,7 +4,6 @@ import mathutils
 import math
 import gpu
 from gpu_extras.batch import batch_for_shader
-from sys import float_info
 from .. import helper
 
 
@@ -19,6 +18,7 @@ class OT_RotateUVsToClosestOrthogonal(bpy.types.Operator):
         self.uvs = []
         self.dirs = []
         self.edges = []
+        self.uv_tree = None
         super().__init__()
 
     def end(self, context):
@@ -31,9 +31,7 @@ class OT_RotateUVsToClosestOrthogonal(bpy.types.Operator):
         self.uvs.clear()
         self.dirs.clear()
         self.edges.clear()
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
             mesh: bpy.types.Mesh = selected_object.data
             bm = bmesh.from_edit_mesh(mesh)
             uv_layer = bm.loops.layers.uv.verify()
@@ -56,29 +54,30 @@ class OT_RotateUVsToClosestOrthogonal(bpy.types.Operator):
                     uv1 = uv2
                     uv2 = uv3
 
+        # Only UVs with a selected neighbour have a direction to rotate.
+        indices = [i for i, d in enumerate(self.dirs) if len(d) > 0]
+        self.uv_tree = helper.get_uv_tree([self.uvs[i] for i in indices], indices)
+
     def get_move(self, context, event):
         mouse = mathutils.Vector(context.region.view2d.region_to_view(event.mouse_region_x, event.mouse_region_y))
-        distance = float_info.max
         closest_uv = mathutils.Vector((0, 0))
         direction = mathutils.Vector((0, 0))
-        for i, uv in enumerate(self.uvs):
+        i = helper.find_closest_uv(self.uv_tree, mouse)
+        if i is not None:
+            uv = self.uvs[i]
             d = self.dirs[i]
-            if len(d) > 0:
-                new_distance = (mouse-uv).length_squared
-                if new_distance < distance:
-                    distance = new_distance
-                    closest_uv = uv
-                    uv1 = d[0]
-                    d1 = (mouse - uv1).project(uv1 - uv)
-                    if len(d) == 1:
-                        direction = uv1 - uv
-                    else:
-                        uv3 = d[1]
-                        d3 = (mouse - uv3).project(uv3 - uv)
-                        if d1 < d3:
-                            direction = d1
-                        else:
-                            direction = d3
+            closest_uv = uv
+            uv1 = d[0]
+            d1 = (mouse - uv1).project(uv1 - uv)
+            if len(d) == 1:
+                direction = uv1 - uv
+            else:
+                uv3 = d[1]
+                d3 = (mouse - uv3).project(uv3 - uv)
+                if d1 < d3:
+                    direction = d1
+                else:
+                    direction = d3
         self.closest_uv = closest_uv
         self.direction = direction.normalized()
 
@@ -147,9 +146,7 @@ class OT_RotateUVsToClosestOrthogonal(bpy.types.Operator):
     def execute(self, context):
         rotation = mathutils.Matrix.Rotation(self.angle, 3, 'Z').to_2x2()
 
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
             mesh: bpy.types.Mesh = selected_object.data
             bm = bmesh.from_edit_mesh(mesh)
             uv_layer = bm.loops.layers.uv.verify()
@@ -160,8 +157,9 @@ class OT_RotateUVsToClosestOrthogonal(bpy.types.Operator):
                     if uv.select:
                         uv.uv = ((uv.uv - self.closest_uv) @ rotation) + self.closest_uv
 
-        bpy.ops.object.mode_set(mode='OBJECT')
-        bpy.ops.object.mode_set(mode='EDIT')
+            bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+        helper.report_shared_meshes(self, context.selected_objects)
         return {"FINISHED"}
 
     def modal(self, context, event):
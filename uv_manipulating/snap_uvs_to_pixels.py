@@ -0,0 +1,74 @@
+import bpy
+import numpy
+from .. import helper, islands, mesh_access, mesh_geometry
+
+SNAP_ITEMS = [
+    ("NONE", "None", "Keep the UVs where they are"),
+    ("UVS", "UVs", "Move every UV to its closest pixel corner"),
+    ("ISLANDS", "Islands", "Move every island as a whole, so the lower left corner of its bounds lands on the closest pixel corner"),
+]
+
+
+def snap_uvs(snap: str, uvs: numpy.ndarray, loop_vertices: numpy.ndarray, offsets: numpy.ndarray, width: int, height: int, selected: numpy.ndarray = None, loop_islands: numpy.ndarray = None) -> numpy.ndarray:
+    """
+    Snap the flat `uvs` of faces with per face `offsets` to the pixel grid by one of the `SNAP_ITEMS`. With a `selected` mask only the selected UVs are moved.
+    Islands are built from the faces unless the island of every loop is given by `loop_islands`.
+    """
+    if snap == "ISLANDS":
+        return islands.snap_islands(uvs, loop_vertices, offsets, width, height, selected, loop_islands)
+    if snap == "UVS":
+        if selected is None:
+            return helper.closest_pixels(uvs, width, height)
+        snapped = numpy.array(uvs, dtype=numpy.float64)
+        snapped[selected] = helper.closest_pixels(snapped[selected], width, height)
+        return snapped
+    return uvs
+
+
+class OT_SnapUVsToPixels(bpy.types.Operator):
+    bl_idname = "uv.snap_uvs_to_pixels"
+    bl_label = "Selection to Pixels"
+    bl_description = "Snap all selected UVs of all selected objects to the closest pixel corners"
+    bl_options = {"REGISTER", "UNDO"}
+
+    snap: bpy.props.EnumProperty(name="Snap", description="How the selected UVs are snapped", items=SNAP_ITEMS[1:], default="UVS")
+
+    def execute(self, context):
+        width, height = helper.get_width_height()
+        snap = self.snap
+        # With synced selection every UV of a selected face counts as selected.
+        sync = context.scene.tool_settings.use_uv_select_sync
+
+        meshes = []
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
+            uv_layer = selected_object.data.uv_layers.active
+            if uv_layer is None:
+                continue
+
+            mesh = mesh_access.MeshAccess(selected_object)
+            selected = None
+            if not sync:
+                selected = helper.get_bools(uv_layer.data, "select")[mesh.loop_indices]
+            # The current UVs are snapped, so the cached islands of the whole mesh apply. Selected parts of one island move together, even if they only connect through unselected faces.
+            loop_islands = None
+            if snap == "ISLANDS":
+                loop_islands = islands.get_islands(mesh.mesh_data, uv_layer).loop_islands[mesh.loop_indices]
+            meshes.append((mesh, uv_layer, (mesh.get_uvs(uv_layer), mesh_geometry.get_loop_vertices(mesh.mesh_data)[mesh.loop_indices], mesh.offsets, selected, loop_islands)))
+
+        uvs = helper.map_threads(
+            lambda uvs, loop_vertices, offsets, selected, loop_islands: snap_uvs(snap, uvs, loop_vertices, offsets, width, height, selected, loop_islands),
+            *zip(*[arrays for _, _, arrays in meshes])
+        )
+        for (mesh, uv_layer, _), mesh_uvs in zip(meshes, uvs):
+            mesh.set_uvs(uv_layer, mesh_uvs)
+
+        helper.report_shared_meshes(self, context.selected_objects)
+        return {"FINISHED"}
+
+
+def register():
+    bpy.utils.register_class(OT_SnapUVsToPixels)
+
+
+def unregister():
+    bpy.utils.unregister_class(OT_SnapUVsToPixels)
@@ -1,9 +1,11 @@
-from . import unwrap_by_direction
+from . import unwrap_by_direction, live_unwrap
 
 
 def register():
     unwrap_by_direction.register()
+    live_unwrap.register()
 
 
 def unregister():
+    live_unwrap.unregister()
     unwrap_by_direction.unregister()
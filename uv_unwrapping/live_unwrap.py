@@ -0,0 +1,203 @@
+import bpy
+import numpy
+from .. import helper, mesh_access
+from . import unwrap_by_direction
+
+PRIMES = numpy.array((0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9), dtype=numpy.uint64)
+
+
+def hash_rows(values: numpy.ndarray) -> numpy.ndarray:
+    """
+    Hash every row of up to three 32 bit values into one uint64.
+    """
+    values = numpy.ascontiguousarray(values)
+    return (values.view(numpy.uint32).astype(numpy.uint64) * PRIMES[:values.shape[1]]).sum(axis=1)
+
+
+def hash_faces(loop_values: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Hash the rows of 32 bit `loop_values` in face order with per face `offsets` into one uint64 per face.
+    """
+    sizes = numpy.diff(offsets)
+    corners = numpy.arange(offsets[-1]) - numpy.repeat(offsets[:-1], sizes) + 1
+    loop_hashes = hash_rows(loop_values) * corners.astype(numpy.uint64)
+    face_hashes = numpy.zeros(len(sizes), dtype=numpy.uint64)
+    if len(loop_hashes) > 0:
+        face_hashes[sizes > 0] = numpy.add.reduceat(loop_hashes, offsets[:-1][sizes > 0])
+    return face_hashes
+
+
+def get_face_fingerprints(co: numpy.ndarray, normals: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Hash the float32 loop coordinates `co` in face order and the `normals` of the faces with per face `offsets` into one uint64 per face.
+    """
+    return hash_faces(numpy.asarray(co, dtype=numpy.float32), offsets) ^ hash_rows(numpy.asarray(normals, dtype=numpy.float32))
+
+
+def match_faces(keys: numpy.ndarray, old_keys: numpy.ndarray) -> numpy.ndarray:
+    """
+    Find an old face with the same key for every face. Returns the index into `old_keys`, or -1 if no old face has the key.
+    """
+    if len(old_keys) == 0:
+        return numpy.full(len(keys), -1, dtype=numpy.int64)
+    order = numpy.argsort(old_keys, kind="stable")
+    sorted_keys = old_keys[order]
+    positions = numpy.minimum(numpy.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return numpy.where(sorted_keys[positions] == keys, order[positions], -1)
+
+
+def project_faces(uv_mapper: unwrap_by_direction.UVMapper, co: numpy.ndarray, normals: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Project every face along the axis direction Unwrap Auto Direction assigns to it, or along its own normal if it has none.
+    """
+    directions = numpy.array(unwrap_by_direction.AXIS_DIRECTIONS, dtype=numpy.float64)
+    classes = unwrap_by_direction.classify_directions(normals, directions)
+    face_directions = numpy.where((classes >= 0)[:, numpy.newaxis], directions[classes], normals)
+    loop_faces = numpy.repeat(numpy.arange(len(normals)), numpy.diff(offsets))
+    rotations = unwrap_by_direction.get_projections(face_directions)
+    return uv_mapper.map(numpy.einsum("lij,lj->li", rotations[loop_faces], co))
+
+
+def get_face_centers(uvs: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Get the mean of the flat `uvs` of every face with per face `offsets`.
+    """
+    sizes = numpy.diff(offsets)
+    loop_faces = numpy.repeat(numpy.arange(len(sizes)), sizes)
+    uvs = numpy.asarray(uvs, dtype=numpy.float64)
+    sums = numpy.stack([numpy.bincount(loop_faces, uvs[:, axis], minlength=len(sizes)) for axis in range(2)], axis=1)
+    return sums / numpy.maximum(sizes, 1)[:, numpy.newaxis]
+
+
+class LiveMesh:
+    """
+    The state of a live mesh after its last update: the geometry `fingerprints` and the `topology` hashes of the vertices of all faces, and the `projection_centers` of their projections.
+    """
+
+    def __init__(self, fingerprints: numpy.ndarray, topology: numpy.ndarray, projection_centers: numpy.ndarray) -> None:
+        self.fingerprints = fingerprints
+        self.topology = topology
+        self.projection_centers = projection_centers
+
+
+# Every live mesh, keyed by the session id of the mesh.
+live_meshes: dict[int, LiveMesh] = {}
+
+# The live meshes whose next geometry update comes from writing their UVs to the edit mesh, so it is skipped.
+own_updates: set[int] = set()
+
+
+def read_mesh(mesh_object: bpy.types.Object) -> tuple[mesh_access.MeshAccess, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Read all faces of a mesh with the coordinates of their loops, their normals, their fingerprints and the hashes of their vertices.
+    """
+    mesh = mesh_access.MeshAccess(mesh_object, selected_only=False)
+    loop_vertices = helper.get_loop_vertices(mesh.mesh_data)[mesh.loop_indices]
+    co = helper.get_vertex_coordinates(mesh.mesh_data)[loop_vertices]
+    normals = helper.get_polygon_vectors(mesh.mesh_data, "normal")
+    return mesh, co, normals, get_face_fingerprints(co, normals, mesh.offsets), hash_faces(loop_vertices[:, numpy.newaxis], mesh.offsets)
+
+
+def start_mesh(mesh_object: bpy.types.Object) -> LiveMesh:
+    """
+    Read the state of a mesh to make it live.
+    """
+    mesh, co, normals, fingerprints, topology = read_mesh(mesh_object)
+    projections = project_faces(unwrap_by_direction.UVMapper(), co, normals, mesh.offsets)
+    return LiveMesh(fingerprints, topology, get_face_centers(projections, mesh.offsets))
+
+
+def update_mesh(mesh_object: bpy.types.Object):
+    """
+    Project the faces of a live mesh again whose geometry changed since the last update. The projection of a changed face is moved by the offset of its current UVs from its previous projection, so it keeps its place in the layout, including UV edits made while live. A new face keeps the center of the UVs it got from Blender.
+    """
+    uv_layer = mesh_object.data.uv_layers.active
+    if uv_layer is None:
+        return
+    mesh, co, normals, fingerprints, topology = read_mesh(mesh_object)
+
+    # Faces are matched by content, not by index, so deleting or adding faces does not touch the others. A face with the same geometry is unchanged, a moved face is found by its vertices.
+    live_mesh = live_meshes[mesh.mesh_data.session_uid]
+    matches = match_faces(fingerprints, live_mesh.fingerprints)
+    changed = matches < 0
+    matches[changed] = match_faces(topology[changed], live_mesh.topology)
+    projection_centers = numpy.zeros((len(matches), 2), dtype=numpy.float64)
+    projection_centers[matches >= 0] = live_mesh.projection_centers[matches[matches >= 0]]
+    live_mesh.fingerprints = fingerprints
+    live_mesh.topology = topology
+    live_mesh.projection_centers = projection_centers
+
+    faces = numpy.flatnonzero(changed)
+    if len(faces) == 0:
+        return
+    loop_positions, offsets = helper.loop_ranges(mesh.offsets[:-1][faces], numpy.diff(mesh.offsets)[faces])
+    projections = project_faces(unwrap_by_direction.UVMapper(), co[loop_positions], normals[faces], offsets)
+    new_centers = get_face_centers(projections, offsets)
+    # A new face has no previous projection, so its offset keeps the center of its UVs.
+    previous_centers = numpy.where((matches[faces] >= 0)[:, numpy.newaxis], projection_centers[faces], new_centers)
+    projection_centers[faces] = new_centers
+    mesh.restrict(faces)
+    face_offsets = get_face_centers(mesh.get_uvs(uv_layer), offsets) - previous_centers
+    mesh.set_uvs(uv_layer, projections + numpy.repeat(face_offsets, numpy.diff(offsets), axis=0))
+    if mesh.bmesh is not None:
+        own_updates.add(mesh.mesh_data.session_uid)
+
+
+@bpy.app.handlers.persistent
+def on_depsgraph_update(scene: bpy.types.Scene, depsgraph: bpy.types.Depsgraph):
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry or not isinstance(update.id, bpy.types.Object):
+            continue
+        mesh_object = update.id.original
+        if mesh_object.type != "MESH" or mesh_object.data.session_uid not in live_meshes:
+            continue
+        if mesh_object.data.session_uid in own_updates:
+            own_updates.discard(mesh_object.data.session_uid)
+            continue
+        update_mesh(mesh_object)
+
+
+class OT_LiveUnwrap(bpy.types.Operator):
+    bl_idname = "uv.live_unwrap"
+    bl_label = "Live Auto Direction"
+    bl_options = {"REGISTER"}
+    bl_description = "Toggle live unwrapping of the selected objects. While live, every face whose geometry changes is projected again along its auto direction and keeps its place in the layout"
+
+    def execute(self, context):
+        mesh_objects = helper.get_mesh_objects(context.selected_objects)
+        if all(mesh_object.data.session_uid in live_meshes for mesh_object in mesh_objects):
+            for mesh_object in mesh_objects:
+                del live_meshes[mesh_object.data.session_uid]
+                own_updates.discard(mesh_object.data.session_uid)
+            self.report({'INFO'}, f"Live unwrap stopped for {len(mesh_objects)} meshes")
+        else:
+            # The current UVs are kept, only faces changed from now on are projected, at their place in the layout.
+            for mesh_object in mesh_objects:
+                if mesh_object.data.session_uid not in live_meshes:
+                    live_meshes[mesh_object.data.session_uid] = start_mesh(mesh_object)
+            self.report({'INFO'}, f"Live unwrap started for {len(mesh_objects)} meshes")
+
+        if live_meshes and on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+        elif not live_meshes and on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+        return {'FINISHED'}
+
+
+def add_menu_item(self: bpy.types.Menu, context):
+    self.layout.separator()
+    self.layout.operator(OT_LiveUnwrap.bl_idname)
+
+
+def register():
+    bpy.utils.register_class(OT_LiveUnwrap)
+    unwrap_by_direction.UNWRAP_MT_UnwrapPixelPerfect.append(add_menu_item)
+
+
+def unregister():
+    bpy.utils.unregister_class(OT_LiveUnwrap)
+    unwrap_by_direction.UNWRAP_MT_UnwrapPixelPerfect.remove(add_menu_item)
+    if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+    live_meshes.clear()
+    own_updates.clear()
@@ -0,0 +1,58 @@
+import numpy
+
+
+def pack_skyline(sizes: numpy.ndarray, width: int) -> numpy.ndarray:
+    """
+    Pack rectangles of integer `(width, height)` `sizes` into a strip of `width` with the skyline bottom left rule, tallest first.
+    Returns the integer `(x, y)` position of every rectangle, measured from the top left of the strip downwards.
+    """
+    sizes = numpy.asarray(sizes, dtype=numpy.int64).reshape(-1, 2)
+    positions = numpy.zeros((len(sizes), 2), dtype=numpy.int64)
+    width = max(width, int(sizes[:, 0].max(initial=0)))
+
+    # The skyline is a list of [x, y, width] segments covering the whole strip.
+    skyline = [[0, 0, width]]
+    for i in numpy.lexsort((-sizes[:, 0], -sizes[:, 1])):
+        rectangle_width, rectangle_height = int(sizes[i, 0]), int(sizes[i, 1])
+
+        best = None
+        for start in range(len(skyline)):
+            x = skyline[start][0]
+            if x + rectangle_width > width:
+                break
+            y = 0
+            end = start
+            covered = 0
+            while covered < rectangle_width:
+                y = max(y, skyline[end][1])
+                covered += skyline[end][2]
+                end += 1
+            if best is None or (y, x) < (best[1], best[0]):
+                best = (x, y, start)
+
+        x, y, start = best
+        positions[i] = (x, y)
+
+        # Replace the covered segments by the new top and the rest of the last covered segment.
+        right = x + rectangle_width
+        end = start
+        while end < len(skyline) and skyline[end][0] + skyline[end][2] <= right:
+            end += 1
+        rest = []
+        if end < len(skyline) and skyline[end][0] < right:
+            segment = skyline[end]
+            rest = [[right, segment[1], segment[0] + segment[2] - right]]
+            end += 1
+        skyline[start:end] = [[x, y + rectangle_height, rectangle_width]] + rest
+
+        # Merge neighbouring segments of the same height.
+        merged = [skyline[0]]
+        for segment in skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1] = [merged[-1][0], merged[-1][1], merged[-1][2] + segment[2]]
+            else:
+                merged.append(segment)
+        skyline = merged
+
+    return positions
+
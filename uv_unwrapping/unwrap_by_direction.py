@@ -1,8 +1,11 @@
 import bpy
 import mathutils
 import math
-from sys import float_info
-from .. import helper
+import numpy
+from .. import helper, mesh_access, mesh_geometry
+from ..image import rasterizer
+from ..uv_manipulating import snap_uvs_to_pixels
+from . import packer
 
 
 class UVMapper:
@@ -16,6 +19,53 @@ class UVMapper:
     def map_y(self, y: float) -> float:
         return y * self.unit_scale / self.height
 
+    def map(self, co: numpy.ndarray) -> numpy.ndarray:
+        """
+        Map projected `(n, 3)` coordinates to `(n, 2)` UVs using their x and z axis.
+        """
+        return numpy.column_stack((co[:, 0] * self.unit_scale / self.width, co[:, 2] * self.unit_scale / self.height))
+
+
+def get_projection(direction: mathutils.Vector) -> numpy.ndarray:
+    """
+    Get the rotation matrix used to project onto the plane with the normal `direction`. It is the rotation of the y axis onto `direction` with a positive y component.
+    """
+    sign = 1
+    if direction.y < 0:
+        sign = -1
+    quaternion = mathutils.Vector((0, 1, 0)).rotation_difference(direction * mathutils.Vector((1, sign, 1)))
+    return numpy.array(quaternion.to_matrix(), dtype=numpy.float64)
+
+
+def get_projections(directions: numpy.ndarray) -> numpy.ndarray:
+    """
+    Get the rotation matrix of `get_projection` for every direction of a `(n, 3)` array at once.
+    """
+    directions = directions * numpy.where(directions[:, 1:2] < 0, (1, -1, 1), (1, 1, 1))
+    length = numpy.linalg.norm(directions, axis=1)
+    b = directions / numpy.where(length > 0, length, 1)[:, numpy.newaxis]
+
+    # Rotate (0, 1, 0) to b around their cross product. As b.y is never negative the rotation is never degenerate.
+    cross = numpy.zeros((len(b), 3, 3), dtype=numpy.float64)
+    cross[:, 0, 1] = b[:, 0]
+    cross[:, 1, 0] = -b[:, 0]
+    cross[:, 1, 2] = -b[:, 2]
+    cross[:, 2, 1] = b[:, 2]
+
+    rotations = numpy.broadcast_to(numpy.identity(3), cross.shape) + cross + cross @ cross / (1 + b[:, 1])[:, numpy.newaxis, numpy.newaxis]
+    rotations[length == 0] = numpy.identity(3)
+    return rotations
+
+
+def project_by_normal(uv_mapper: UVMapper, normals: numpy.ndarray, centers: numpy.ndarray, co: numpy.ndarray, uvs: numpy.ndarray, offsets: numpy.ndarray) -> numpy.ndarray:
+    """
+    Project every face onto the plane of its normal. `normals` and `centers` are given per face, `co` and the old `uvs` per loop. Every face keeps its UV center.
+    """
+    loop_faces = numpy.repeat(numpy.arange(len(normals)), numpy.diff(offsets))
+    rotations = get_projections(normals)
+    uv_centers = rasterizer.face_centers(uvs, offsets)
+    return uv_mapper.map(numpy.einsum("lij,lj->li", rotations[loop_faces], co - centers[loop_faces])) + uv_centers[loop_faces]
+
 
 class OT_UnwrapByDirection(bpy.types.Operator):
     bl_idname = "uv.unwrap_by_direction"
@@ -24,31 +74,33 @@ class OT_UnwrapByDirection(bpy.types.Operator):
     bl_description = "Use a vector as normal for a projection plane and project all selected faces"
 
     vector: bpy.props.FloatVectorProperty(name="Direction", description="The direction of the projection plane normal", default=(0, 0, 0))
+    snap: bpy.props.EnumProperty(name="Snap to Pixels", description="Snap the unwrapped UVs to the pixel grid", items=snap_uvs_to_pixels.SNAP_ITEMS, default="NONE")
 
     def execute(self, context):
-        bpy.ops.object.mode_set(mode='OBJECT')
-
-        vector = mathutils.Vector(self.vector)
-        sign = 1
-        if vector.y < 0:
-            sign = -1
-        quaternion = mathutils.Vector((0, 1, 0)).rotation_difference(vector * mathutils.Vector((1, sign, 1)))
+        snap = self.snap
+        rotation = get_projection(mathutils.Vector(self.vector))
 
         uv_mapper = UVMapper()
 
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
+        meshes = []
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
+            uv_layer = selected_object.data.uv_layers.active
+            if uv_layer is None:
                 continue
-            mesh_data: bpy.types.Mesh = selected_object.data
-            for polygon in mesh_data.polygons:
-                if polygon.select:
-                    for i in polygon.loop_indices:
-                        co = quaternion @ mesh_data.vertices[mesh_data.loops[i].vertex_index].co
-                        mesh_uv_loop = mesh_data.uv_layers.active.data[i]
-                        mesh_uv_loop.uv.x = uv_mapper.map_x(co.x)
-                        mesh_uv_loop.uv.y = uv_mapper.map_y(co.z)
-
-        bpy.ops.object.mode_set(mode='EDIT')
+
+            mesh = mesh_access.MeshAccess(selected_object)
+            loop_vertices = mesh_geometry.get_loop_vertices(mesh.mesh_data)[mesh.loop_indices]
+            co = mesh_geometry.get_vertex_coordinates(mesh.mesh_data)[loop_vertices]
+            meshes.append((mesh, uv_layer, (co, loop_vertices, mesh.offsets)))
+
+        uvs = helper.map_threads(
+            lambda co, loop_vertices, offsets: snap_uvs_to_pixels.snap_uvs(snap, uv_mapper.map(co @ rotation.T), loop_vertices, offsets, uv_mapper.width, uv_mapper.height),
+            *zip(*[arrays for _, _, arrays in meshes])
+        )
+        for (mesh, uv_layer, _), mesh_uvs in zip(meshes, uvs):
+            mesh.set_uvs(uv_layer, mesh_uvs)
+
+        helper.report_shared_meshes(self, context.selected_objects)
         return {'FINISHED'}
 
 
@@ -58,100 +110,183 @@ class OT_UnwrapByNormal(bpy.types.Operator):
     bl_options = {"REGISTER", "UNDO"}
     bl_description = "For every selected face use its normal for a projection plane"
 
-    def execute(self, context):
-        bpy.ops.object.mode_set(mode='OBJECT')
+    snap: bpy.props.EnumProperty(name="Snap to Pixels", description="Snap the unwrapped UVs to the pixel grid", items=snap_uvs_to_pixels.SNAP_ITEMS, default="NONE")
 
+    def execute(self, context):
+        snap = self.snap
         uv_mapper = UVMapper()
 
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
+        meshes = []
+        for selected_object in helper.get_mesh_objects(context.selected_objects):
+            uv_layer = selected_object.data.uv_layers.active
+            if uv_layer is None:
                 continue
-            mesh_data: bpy.types.Mesh = selected_object.data
-            for polygon in mesh_data.polygons:
-                if polygon.select:
-                    uvs = mesh_data.uv_layers.active.data
-                    center = mathutils.Vector((0, 0))
-                    for i in polygon.loop_indices:
-                        center += uvs[i].uv
-                    center /= len(polygon.loop_indices)
-
-                    for i in polygon.loop_indices:
-                        n = polygon.normal
-                        sign = 1
-                        if n.y < 0:
-                            sign = -1
-                        quaternion = mathutils.Vector((0, 1, 0)).rotation_difference(n * mathutils.Vector((1, sign, 1)))
-
-                        co = quaternion @ (mesh_data.vertices[mesh_data.loops[i].vertex_index].co - polygon.center)
-
-                        uv = uvs[i].uv
-                        uv.x = uv_mapper.map_x(co.x)
-                        uv.y = uv_mapper.map_y(co.z)
-                        uv += center
-
-        bpy.ops.object.mode_set(mode='EDIT')
+
+            mesh = mesh_access.MeshAccess(selected_object)
+            mesh_data = mesh.mesh_data
+            loop_vertices = mesh_geometry.get_loop_vertices(mesh_data)[mesh.loop_indices]
+            meshes.append((mesh, uv_layer, (
+                mesh_geometry.get_polygon_vectors(mesh_data, "normal")[mesh.polygons],
+                mesh_geometry.get_polygon_vectors(mesh_data, "center")[mesh.polygons],
+                mesh_geometry.get_vertex_coordinates(mesh_data)[loop_vertices],
+                mesh.get_uvs(uv_layer),
+                mesh.offsets,
+                loop_vertices
+            )))
+
+        def project(normals, centers, co, uvs, offsets, loop_vertices):
+            uvs = project_by_normal(uv_mapper, normals, centers, co, uvs, offsets)
+            return snap_uvs_to_pixels.snap_uvs(snap, uvs, loop_vertices, offsets, uv_mapper.width, uv_mapper.height)
+
+        uvs = helper.map_threads(project, *zip(*[arrays for _, _, arrays in meshes]))
+        for (mesh, uv_layer, _), mesh_uvs in zip(meshes, uvs):
+            mesh.set_uvs(uv_layer, mesh_uvs)
+
+        helper.report_shared_meshes(self, context.selected_objects)
         return {'FINISHED'}
 
 
+AXIS_DIRECTIONS = [
+    (0, 1, 0),
+    (0, -1, 0),
+    (1, 0, 0),
+    (-1, 0, 0),
+    (0, 0, 1),
+    (0, 0, -1),
+]
+
+# The axes first, then the twelve edge and eight corner diagonals of a cube.
+BEVEL_DIRECTIONS = AXIS_DIRECTIONS + [
+    (x, y, z)
+    for x in (1, -1, 0) for y in (1, -1, 0) for z in (1, -1, 0)
+    if abs(x) + abs(y) + abs(z) > 1
+]
+
+# The directions and if a face goes to the closest direction within an angle instead of the first one.
+# Diagonals are 45° from the axes, so they only get faces if the closest direction wins.
+DIRECTION_SETS = {
+    "AXES": (AXIS_DIRECTIONS, False),
+    "BEVEL": (BEVEL_DIRECTIONS, True),
+}
+
+
+def classify_directions(normals: numpy.ndarray, directions: numpy.ndarray, closest: bool = False, angles: list[float] = (math.pi / 4, math.pi / 3, math.pi / 2)) -> numpy.ndarray:
+    """
+    Assign every normal to a direction in one pass. The first angle any direction is within wins, and for that angle the first such direction in order or the closest one.
+    Returns the direction index of every normal or -1 if it is within no angle.
+    """
+    directions = directions / numpy.linalg.norm(directions, axis=1)[:, numpy.newaxis]
+    length = numpy.linalg.norm(normals, axis=1)
+    dots = (normals @ directions.T) / numpy.where(length > 0, length, 1)[:, numpy.newaxis]
+    normal_angles = numpy.arccos(numpy.clip(dots, -1, 1))
+
+    within = normal_angles[:, numpy.newaxis, :] <= numpy.asarray(angles)[numpy.newaxis, :, numpy.newaxis]
+    within &= (length > 0)[:, numpy.newaxis, numpy.newaxis]
+    within_angle = within.any(axis=2)
+    first_angle = numpy.argmax(within_angle, axis=1)
+    within = within[numpy.arange(len(normals)), first_angle]
+    if closest:
+        classes = numpy.argmin(numpy.where(within, normal_angles, numpy.inf), axis=1)
+    else:
+        classes = numpy.argmax(within, axis=1)
+    classes[~within_angle.any(axis=1)] = -1
+    return classes
+
+
+class SelectedFaces:
+    """
+    The selected faces of all selected mesh objects as flat arrays. The UVs of their loops can be changed in `uvs` and are written back with `write`.
+    """
+
+    def __init__(self, objects: list[bpy.types.Object]) -> None:
+        self.meshes = []
+        normals = []
+        co = []
+        vertices = []
+        faces = []
+        vertex_count = 0
+        for selected_object in helper.get_mesh_objects(objects):
+            uv_layer = selected_object.data.uv_layers.active
+            if uv_layer is None:
+                continue
+
+            mesh = mesh_access.MeshAccess(selected_object)
+            mesh_data = mesh.mesh_data
+            self.meshes.append((mesh, uv_layer))
+
+            normals.append(mesh_geometry.get_polygon_vectors(mesh_data, "normal")[mesh.polygons])
+            loop_vertices = mesh_geometry.get_loop_vertices(mesh_data)[mesh.loop_indices]
+            co.append(mesh_geometry.get_vertex_coordinates(mesh_data)[loop_vertices])
+            vertices.append(loop_vertices.astype(numpy.int64) + vertex_count)
+            vertex_count += len(mesh_data.vertices)
+            faces.append((mesh.get_uvs(uv_layer), mesh.offsets))
+
+        self.normals = numpy.concatenate(normals + [numpy.zeros((0, 3), dtype=numpy.float32)])
+        self.co = numpy.concatenate(co + [numpy.zeros((0, 3), dtype=numpy.float32)])
+        # The vertex of every loop, unique over all meshes.
+        self.vertices = numpy.concatenate(vertices + [numpy.zeros(0, dtype=numpy.int64)])
+        uvs, self.offsets = helper.concatenate_faces(faces)
+        self.uvs = uvs.astype(numpy.float64)
+        self.loop_faces = numpy.repeat(numpy.arange(len(self.offsets) - 1), numpy.diff(self.offsets))
+
+    def get_loops(self, faces: numpy.ndarray) -> numpy.ndarray:
+        return numpy.flatnonzero(numpy.isin(self.loop_faces, faces))
+
+    def get_islands(self, groups: numpy.ndarray) -> numpy.ndarray:
+        """
+        Split faces into islands of faces which share a vertex and are in the same group. Faces in group -1 get island -1.
+        """
+        face_count = len(self.offsets) - 1
+        loop_groups = groups[self.loop_faces]
+        grouped = loop_groups >= 0
+        keys, key_count = helper.get_row_keys(numpy.column_stack((self.vertices[grouped], loop_groups[grouped])))
+        labels = helper.connected_components(face_count + key_count, self.loop_faces[grouped], face_count + keys)
+
+        _, islands = numpy.unique(labels[:face_count][groups >= 0], return_inverse=True)
+        face_islands = numpy.full(face_count, -1, dtype=numpy.int64)
+        face_islands[groups >= 0] = islands.reshape(-1)
+        return face_islands
+
+    def write(self):
+        start = 0
+        for mesh, uv_layer in self.meshes:
+            mesh.set_uvs(uv_layer, self.uvs[start:start + len(mesh.loop_indices)])
+            start += len(mesh.loop_indices)
+
+
 class DirectionPolygons:
-    def __init__(self, direction: mathutils.Vector) -> None:
+    def __init__(self, direction: mathutils.Vector, faces: numpy.ndarray) -> None:
         self.direction = direction
-        self.polygons: list[bpy.types.MeshPolygon] = []
+        self.faces = faces
 
-    def try_append(self, polygon: bpy.types.MeshPolygon, angle: float) -> bool:
-        if angle < polygon.normal.angle(self.direction, 360):
-            return False
-        else:
-            self.polygons.append(polygon)
-            return True
-
-    def get_directed(self, uv_mapper: UVMapper):
-        return DirectedPolygons(self, uv_mapper)
+    def get_directed(self, selected_faces: SelectedFaces, uv_mapper: UVMapper):
+        return DirectedPolygons(self, selected_faces, uv_mapper)
 
 
 class DirectedPolygons:
-    def __init__(self, direction_polygons: DirectionPolygons, uv_mapper: UVMapper) -> None:
-        uvs = []
-        if len(direction_polygons.polygons) > 0:
-            mesh_data: bpy.types.Mesh = direction_polygons.polygons[0].id_data
-            sign = 1
-            if direction_polygons.direction.y < 0:
-                sign = -1
-            quaternion = mathutils.Vector((0, 1, 0)).rotation_difference(direction_polygons.direction * mathutils.Vector((1, sign, 1)))
-
-            min_x = float_info.max
-            min_y = float_info.max
-            max_x = -float_info.max
-            max_y = -float_info.max
-
-            for polygon in direction_polygons.polygons:
-                for i in polygon.loop_indices:
-                    co = quaternion @ (mesh_data.vertices[mesh_data.loops[i].vertex_index].co)
-                    uv = mesh_data.uv_layers.active.data[i].uv
-                    uv.x = uv_mapper.map_x(co.x)
-                    uv.y = uv_mapper.map_y(co.z)
-
-                    min_x = min(uv.x, min_x)
-                    min_y = min(uv.y, min_y)
-                    max_x = max(uv.x, max_x)
-                    max_y = max(uv.y, max_y)
-
-                    uvs.append(uv)
-
-            self.min = mathutils.Vector((min_x, min_y))
-            self.max = mathutils.Vector((max_x, max_y))
-            self.size = self.max - self.min
+    """
+    The loops of a direction group projected onto its plane, with their UV bounds.
+    """
+
+    def __init__(self, direction_polygons: DirectionPolygons, selected_faces: SelectedFaces, uv_mapper: UVMapper) -> None:
+        self.selected_faces = selected_faces
+        self.loops = selected_faces.get_loops(direction_polygons.faces)
+        if len(self.loops) > 0:
+            rotation = get_projection(direction_polygons.direction)
+            uvs = uv_mapper.map(selected_faces.co[self.loops] @ rotation.T)
+            selected_faces.uvs[self.loops] = uvs
+
+            self.min = mathutils.Vector(uvs.min(axis=0))
+            self.max = mathutils.Vector(uvs.max(axis=0))
         else:
             self.min = mathutils.Vector((0, 0))
             self.max = mathutils.Vector((0, 0))
-        self.uvs: list(mathutils.Vector) = uvs
         self.size = self.max - self.min
 
     def move(self, vector: mathutils.Vector):
-        for uv in self.uvs:
-            self.min += vector
-            self.max += vector
-            uv += vector
+        self.min += vector
+        self.max += vector
+        self.selected_faces.uvs[self.loops] += tuple(vector)
 
 
 class OT_UnwrapByAutoDirection(bpy.types.Operator):
@@ -160,45 +295,81 @@ class OT_UnwrapByAutoDirection(bpy.types.Operator):
     bl_options = {"REGISTER", "UNDO"}
     bl_description = "Use the major facing direction of a selected face and use this vector as normal for a projection plane"
 
-    def execute(self, context):
-        bpy.ops.object.mode_set(mode='OBJECT')
+    directions: bpy.props.EnumProperty(
+        name="Directions",
+        description="The directions a face can be projected along",
+        items=[
+            ("AXES", "Axes", "The six axis directions"),
+            ("BEVEL", "Axes and Diagonals", "The six axis directions and the twenty diagonals between them, for bevelled models"),
+        ],
+        default="AXES"
+    )
+    arrangement: bpy.props.EnumProperty(
+        name="Arrangement",
+        description="How the projected faces are placed on the image",
+        items=[
+            ("PACK", "Pack Islands", "Pack every connected island of a direction into the image, aligned to the pixel grid"),
+            ("CROSS", "Cross", "Place every direction as one block in a cross"),
+        ],
+        default="PACK"
+    )
+    margin: bpy.props.IntProperty(name="Margin", description="The number of pixels between packed islands", default=0, min=0)
 
+    def execute(self, context):
         uv_mapper = UVMapper()
 
-        selected_polygons = []
-        for selected_object in context.selected_objects:
-            if not selected_object.type == "MESH":
-                continue
-            mesh_data: bpy.types.Mesh = selected_object.data
-            for polygon in mesh_data.polygons:
-                if polygon.select:
-                    selected_polygons.append(polygon)
+        selected_faces = SelectedFaces(context.selected_objects)
+        directions, closest = DIRECTION_SETS[self.directions]
+        directions = numpy.array(directions, dtype=numpy.float64)
+        classes = classify_directions(selected_faces.normals, directions, closest)
 
         direction_polygons = [
-            DirectionPolygons(mathutils.Vector((0, 1, 0))),
-            DirectionPolygons(mathutils.Vector((0, -1, 0))),
-            DirectionPolygons(mathutils.Vector((1, 0, 0))),
-            DirectionPolygons(mathutils.Vector((-1, 0, 0))),
-            DirectionPolygons(mathutils.Vector((0, 0, 1))),
-            DirectionPolygons(mathutils.Vector((0, 0, -1))),
+            DirectionPolygons(mathutils.Vector(direction).normalized(), numpy.flatnonzero(classes == i))
+            for i, direction in enumerate(directions)
         ]
-        for angle in [math.pi / 4, math.pi / 3, math.pi / 2]:
-            i = 0
-            while i < len(selected_polygons):
-                for direction_polygon in direction_polygons:
-                    if direction_polygon.try_append(selected_polygons[i], angle):
-                        selected_polygons.pop(i)
-                        i -= 1
-                        break
-                i += 1
-                pass
-
-        p_y = direction_polygons[0].get_directed(uv_mapper)
-        n_y = direction_polygons[1].get_directed(uv_mapper)
-        p_x = direction_polygons[2].get_directed(uv_mapper)
-        n_x = direction_polygons[3].get_directed(uv_mapper)
-        p_z = direction_polygons[4].get_directed(uv_mapper)
-        n_z = direction_polygons[5].get_directed(uv_mapper)
+        directed = [direction_polygon.get_directed(selected_faces, uv_mapper) for direction_polygon in direction_polygons]
+
+        # Without an image there is no pixel grid to pack on.
+        if self.arrangement == "PACK" and (uv_mapper.width, uv_mapper.height) != (1, 1):
+            self.pack(selected_faces, selected_faces.get_islands(classes), uv_mapper)
+        else:
+            self.place_cross(directed)
+
+        selected_faces.write()
+
+        helper.report_shared_meshes(self, context.selected_objects)
+        return {'FINISHED'}
+
+    def pack(self, selected_faces: SelectedFaces, face_islands: numpy.ndarray, uv_mapper: UVMapper):
+        """
+        Pack the islands in whole pixels from the top left of the image. The lower left corner of every island lands on a pixel corner.
+        """
+        loop_islands = face_islands[selected_faces.loop_faces]
+        loops = numpy.flatnonzero(loop_islands >= 0)
+        if len(loops) == 0:
+            return
+        loop_islands = loop_islands[loops]
+        island_count = loop_islands.max() + 1
+
+        size = numpy.array((uv_mapper.width, uv_mapper.height), dtype=numpy.float64)
+        pixels = selected_faces.uvs[loops] * size
+        island_min = numpy.full((island_count, 2), numpy.inf)
+        island_max = numpy.full((island_count, 2), -numpy.inf)
+        numpy.minimum.at(island_min, loop_islands, pixels)
+        numpy.maximum.at(island_max, loop_islands, pixels)
+
+        # Ignore float noise so an island of exactly n pixels is not rounded up to n + 1.
+        sizes = numpy.ceil(island_max - island_min - 1e-4).astype(numpy.int64) + self.margin
+        positions = packer.pack_skyline(sizes, uv_mapper.width)
+
+        corners = numpy.column_stack((positions[:, 0], uv_mapper.height - positions[:, 1] - sizes[:, 1] + self.margin))
+        selected_faces.uvs[loops] += ((corners - island_min) / size)[loop_islands]
+
+        if numpy.any(corners[:, 1] < 0):
+            self.report({'WARNING'}, "The islands do not fit into the image")
+
+    def place_cross(self, directed: list[DirectedPolygons]):
+        p_y, n_y, p_x, n_x, p_z, n_z = directed[:6]
 
         m_p_y = mathutils.Vector((
             -p_y.min.x,
@@ -232,8 +403,11 @@ class OT_UnwrapByAutoDirection(bpy.types.Operator):
         p_z.move(m_p_z)
         n_z.move(m_n_z)
 
-        bpy.ops.object.mode_set(mode='EDIT')
-        return {'FINISHED'}
+        # Diagonal groups are placed in a row right of the cross.
+        x = p_y.size.x + n_x.size.x + n_y.size.x + p_x.size.x
+        for diagonal in directed[6:]:
+            diagonal.move(mathutils.Vector((x - diagonal.min.x, 1 - diagonal.max.y)))
+            x += diagonal.size.x
 
 
 class UNWRAP_MT_UnwrapPixelPerfect(bpy.types.Menu):